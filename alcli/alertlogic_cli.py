@@ -5,37 +5,52 @@ import sys
 import os
 import platform
 import json
-import jmespath
-from json import JSONDecodeError
 import logging
 import argparse
-import re
-import pydoc
 import shutil 
+import importlib
+import importlib.util
 
-from urllib.parse import urlparse
 from collections import OrderedDict
-from pydoc import pager
-
-
-import almdrlib
-from almdrlib.session import Session
-from almdrlib.client import Client
-from almdrlib.client import OpenAPIKeyWord
-from almdrlib.region import Region
-from almdrlib.region import Residency
-from almdrlib.version import version as almdrlib_version
 
+#
+# almdrlib, alsdkdefs, jmespath and pydoc are imported where they are used,
+# so that --version and top level help don't pay for loading the SDK
+#
+from alcli.timing import timer
+from alcli.timing import timing_from_env
+from alcli.tracing import tracer
+from alcli.tracing import trace_file_from_env
+from alcli.jsoncodec import json_codec
+from alcli.jsoncodec import JSON_BACKENDS
+from alcli.profiling import parse_profile_args
+from alcli.profiling import profiled
 from alcli.cliparser import ALCliArgsParser
-from alcli.cliparser import ALCliParserUtils
-from alcli.cliparser import USAGE
 from alcli.clihelp import ALCliMainHelpFormatter
-from alcli.clihelp import ALCliServiceHelpFormatter
-from alcli.clihelp import ALCliOperationHelpFormatter
+from alcli.specindex import ALCliSpecIndex
+from alcli.helpcache import ALCliHelpCache
+from alcli.helpcache import render_help
+from alcli.searchindex import ALCliSearchIndex
+from alcli.searchindex import FindCommand
+from alcli.tokencache import create_session
+from alcli.tokencache import invalidate_token
+from alcli.tokencache import ALCliSessionCache
+from alcli.batch import BatchCommand
+from alcli.shell import ShellCommand
+from alcli.daemon import DaemonCommand
+from alcli.responsecache import CacheCommand
+from alcli.completion import CompletionCommand
+from alcli.responsecache import get_response_cache
+from alcli.fileinput import close_file_values
+from alcli.encoding import EncoderPlan
+from alcli.concurrency import ORDERS
+from alcli.output import OUTPUT_FORMATS
+from alcli.output import OUTPUT_JSON
+from alcli.output import get_writer
+from alcli.query import search
+from alcli.query import validate_query
 from alcli.version import version as alcli_version
 
-from alsdkdefs.version import version as alsdkdefs_version
-
 if getattr(sys, 'frozen', False):
     # frozen
     dir_ = os.path.dirname(sys.executable)
@@ -50,6 +65,27 @@ logger = logging.getLogger('alcli.almdr_cli')
 LOG_FORMAT = (
     '%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s')
 
+def get_package_version(package):
+    """
+        Read <package>.version without running the package's __init__,
+        which for almdrlib and alsdkdefs loads the whole SDK
+    """
+    spec = importlib.util.find_spec(package)
+    for location in (spec and spec.submodule_search_locations) or []:
+        version_path = os.path.join(location, 'version.py')
+        if os.path.isfile(version_path):
+            version_spec = importlib.util.spec_from_file_location(
+                    f"_{package}_version", version_path)
+            version_module = importlib.util.module_from_spec(version_spec)
+            version_spec.loader.exec_module(version_module)
+            return version_module.version
+
+    return importlib.import_module(f"{package}.version").version
+
+
+almdrlib_version = get_package_version('almdrlib')
+alsdkdefs_version = get_package_version('alsdkdefs')
+
 GLOBAL_ARGUMENTS = [
         'access_key_id',
         'secret_key',
@@ -57,9 +93,33 @@ GLOBAL_ARGUMENTS = [
         'residency',
         'global_endpoint',
         'query',
-        'debug'
+        'debug',
+        'timing',
+        'timing_file',
+        'profile_cpu',
+        'profile_mem',
+        'concurrency',
+        'rate_limit',
+        'results_order',
+        'account_ids',
+        'paginate',
+        'max_items',
+        'pagination_page_size',
+        'output_format',
+        'cache_ttl',
+        'connect_timeout',
+        'read_timeout',
+        'retries',
+        'retry_backoff',
+        'pool_size',
+        'keep_alive',
+        'trace_file',
+        'json_backend'
     ]
 
+JSON_CONTENT_TYPES = ['application/json', 'alertlogic/json']
+
+
 def cli_pager(text):
     """The first time this is called, determine what kind of pager to use."""
     global cli_pager
@@ -67,6 +127,7 @@ def cli_pager(text):
     cli_pager(text)
 
 def get_cli_pager():
+    import pydoc
     if sys.platform == 'win32':
         return lambda text: pydoc.pipepager(text, 'more /C')
     if shutil.which('less') is not None:
@@ -77,51 +138,142 @@ class AlertLogicCLI(object):
     def __init__(self):
         self._subparsers = None
         self._services = None
+        self._commands = None
         self._arguments = None
+        self._spec_index = ALCliSpecIndex(alsdkdefs_version, almdrlib_version)
+        self._help_cache = ALCliHelpCache(self._spec_index, alcli_version)
+        self._search_index = ALCliSearchIndex(self._spec_index)
 
     def main(self, args=None):
-        args = args or sys.argv[1:]
-        services = self._get_services()
-        parser = self._create_parser(services)
+        args = sys.argv[1:] if args is None else args
+        timer.mark('startup')
+        self._timing_stderr, self._timing_file = timing_from_env()
+        profile_cpu, profile_mem = parse_profile_args(args)
+        status = None
+        try:
+            with profiled(cpu_file=profile_cpu, mem_file=profile_mem):
+                status = self._main(args) or 0
+                return status
+        finally:
+            tracer.finish(status)
+            if self._timing_stderr or self._timing_file:
+                timer.write(stderr=self._timing_stderr,
+                            file_path=self._timing_file)
+
+    def run_command(self, args, parsed_globals):
+        """
+            Run another command line in this process, with global options
+            defaulting to the ones in parsed_globals. Used by alcli shell
+        """
+        defaults = argparse.Namespace(**{
+            name: value for name, value in vars(parsed_globals).items()
+            if name in GLOBAL_ARGUMENTS
+        })
+        status = None
+        try:
+            status = self._main(args, defaults) or 0
+            return status
+        finally:
+            tracer.finish(status)
 
-        parsed_args, remaining = parser.parse_known_args(args)
+    def keep_sessions(self):
+        """ Reuse sessions and service clients across run_command calls """
+        sessions = ALCliSessionCache()
+        for service in self._get_services().values():
+            service.use_sessions(sessions)
+        return sessions
+
+    def create_parser(self):
+        return self._create_parser(self._get_services(), self._get_commands())
+
+    def list_commands(self):
+        return list(self._get_commands())
+
+    @property
+    def spec_index(self):
+        return self._spec_index
+
+    def _main(self, args, defaults=None):
+        with timer.phase('load_index'):
+            services = self._get_services()
+        commands = self._get_commands()
+        with timer.phase('create_parser'):
+            parser = self._create_parser(services, commands)
+
+        with timer.phase('parse_args'):
+            parsed_args, remaining = parser.parse_known_args(args, defaults)
         logger.debug(f"Parsed Arguments: {parsed_args}, Remaining: {remaining}")
+        self._timing_stderr = self._timing_stderr or parsed_args.timing
+        self._timing_file = parsed_args.timing_file or self._timing_file
+        trace_file = parsed_args.trace_file or trace_file_from_env()
+        if trace_file:
+            tracer.start(trace_file, ' '.join(
+                ['alcli'] + [name for name in [
+                    parsed_args.service, getattr(parsed_args, 'operation', None)
+                ] if name]))
+        try:
+            json_codec.use(parsed_args.json_backend)
+        except (ImportError, ValueError) as e:
+            sys.stderr.write(f"Unable to use JSON backend: {e}\n")
+            return 255
 
         if parsed_args.service == 'help' or parsed_args.service is None:
+            if getattr(parsed_args, 'prebuild', False):
+                with timer.phase('prebuild_help'):
+                    result = self._help_cache.prebuild()
+                get_writer(parsed_args.output_format).write(result)
+                return 0
             AlertLogicCLI.show_help(
-                     ALCliMainHelpFormatter(Session.list_services())
+                     ALCliMainHelpFormatter(
+                         self._spec_index.list_services(),
+                         self._spec_index.list_global_endpoints(),
+                         self._spec_index.list_residencies()
+                     )
                 )
-            return 128
+            return 0
 
-        if parsed_args.operation == 'help':
-            AlertLogicCLI.show_help(
-                    ALCliServiceHelpFormatter(
-                        parsed_args.service,
-                        Session.get_service_api(parsed_args.service)
-                    )
-                )
-            return 128
+        command = commands.get(parsed_args.service)
+        if command is None and parsed_args.operation == 'help':
+            AlertLogicCLI.show_help_text(
+                    self._help_cache.get_service_help(parsed_args.service))
+            return 0
 
-        if hasattr(parsed_args, 'help') and \
+        if command is None and \
+                hasattr(parsed_args, 'help') and \
                 hasattr(parsed_args, 'service') and \
                 hasattr(parsed_args, 'operation') and \
                 parsed_args.help == 'help':
-            spec = Session.get_service_api(parsed_args.service)['operations']
-            AlertLogicCLI.show_help(
-                    ALCliOperationHelpFormatter(
-                        spec.get(parsed_args.operation, {})
-                    )
-                )
+            AlertLogicCLI.show_help_text(
+                    self._help_cache.get_operation_help(
+                        parsed_args.service, parsed_args.operation))
             return 0
 
+        with timer.phase('import_sdk'):
+            import almdrlib
+            import requests
+
+        if parsed_args.query:
+            # Fail on a malformed expression before making any request
+            error = validate_query(parsed_args.query)
+            if error:
+                sys.stderr.write(f"{error}\n")
+                return 255
+
         try:
-            return services[parsed_args.service](remaining, parsed_args)
+            with timer.phase('command'):
+                if command is not None:
+                    return command(remaining, parsed_args)
+                return services[parsed_args.service](remaining, parsed_args)
         except almdrlib.exceptions.AlmdrlibValueError as e:
             sys.stderr.write(f"{e}\n")
             return 255
         except almdrlib.session.AuthenticationException as e:
             sys.stderr.write("Access Denied\n")
             return 255
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            # Raised once retries are exhausted
+            sys.stderr.write(f"Request failed: {e}\n")
+            return 255
         except Exception as e:
             template = "An exception of type {0} occurred. Arguments:\n{1!r}"
             message = template.format(type(e).__name__, e.args)
@@ -131,37 +283,87 @@ class AlertLogicCLI(object):
     def _get_services(self):
         if self._services is None:
             self._services = OrderedDict()
-            services_list = Session.list_services()
+            services_list = self._spec_index.list_services()
             self._services = {
-                service_name: ServiceOperation(name=service_name)
+                service_name: ServiceOperation(
+                    name=service_name, spec_index=self._spec_index)
                 for service_name in services_list
             }
 
         return self._services
 
-    def _create_parser(self, services):
+    def _get_commands(self):
+        if self._commands is None:
+            commands = [
+                BatchCommand(self._get_services()),
+                ShellCommand(self),
+                DaemonCommand(self, self._get_services()),
+                CacheCommand(),
+                CompletionCommand(self),
+                FindCommand(self._search_index)
+            ]
+            self._commands = {command.name: command for command in commands}
+        return self._commands
+
+    def _create_parser(self, services, commands):
         parser = ALCliArgsParser(
                 services,
+                commands,
                 f"alcli/{alcli_version} Python/{platform.python_version()}"
                 f" almdrlib/{almdrlib_version}"
                 f" alsdkdefs/{alsdkdefs_version}",
                 "Alert Logic CLI Utility",
-                prog="alcli")
+                prog="alcli",
+                search_index=self._search_index)
 
         # Add Global Options
         parser.add_argument('--access_key_id', dest='access_key_id', default=None)
         parser.add_argument('--secret_key', dest='secret_key', default=None)
         parser.add_argument('--profile', dest='profile', default=None)
-        parser.add_argument('--residency', dest='residency', default=None, choices=Residency.list_residencies())
-        parser.add_argument('--global_endpoint', dest='global_endpoint', default=None, choices=Region.list_endpoints())
+        parser.add_argument('--residency', dest='residency', default=None,
+                            choices=self._spec_index.list_residencies())
+        parser.add_argument('--global_endpoint', dest='global_endpoint', default=None,
+                            choices=self._spec_index.list_global_endpoints())
         parser.add_argument('--query', dest='query', default=None)
         parser.add_argument('--debug', dest='debug', default=False, action="store_true")
+        parser.add_argument('--timing', dest='timing', default=False, action="store_true")
+        parser.add_argument('--timing_file', dest='timing_file', default=None)
+        parser.add_argument('--profile_cpu', dest='profile_cpu', default=None)
+        parser.add_argument('--profile_mem', dest='profile_mem', default=None)
+        parser.add_argument('--concurrency', dest='concurrency', default=1, type=int)
+        parser.add_argument('--rate_limit', dest='rate_limit', default=None, type=float)
+        # Operations of some services take an 'order' parameter of their own
+        parser.add_argument('--order', dest='results_order', default=None, choices=ORDERS)
+        parser.add_argument('--account_ids', dest='account_ids', default=None)
+        parser.add_argument('--paginate', dest='paginate', default=False, action="store_true")
+        parser.add_argument('--max_items', dest='max_items', default=None, type=int)
+        # Operations of assets_query take a 'page_size' parameter of their own
+        parser.add_argument('--page_size', dest='pagination_page_size', default=None, type=int)
+        # Operations of some services take an 'output' parameter of their own
+        parser.add_argument('--output', dest='output_format', default=OUTPUT_JSON,
+                            choices=OUTPUT_FORMATS)
+        parser.add_argument('--cache_ttl', dest='cache_ttl', default=None, type=int)
+        parser.add_argument('--connect_timeout', dest='connect_timeout', default=None, type=float)
+        parser.add_argument('--read_timeout', dest='read_timeout', default=None, type=float)
+        parser.add_argument('--retries', dest='retries', default=None, type=int)
+        parser.add_argument('--retry_backoff', dest='retry_backoff', default=None, type=float)
+        parser.add_argument('--pool_size', dest='pool_size', default=None, type=int)
+        parser.add_argument('--keep_alive', dest='keep_alive', default=None,
+                            choices=['true', 'false'])
+        parser.add_argument('--trace_file', dest='trace_file', default=None)
+        parser.add_argument('--json_backend', dest='json_backend', default=None,
+                            choices=JSON_BACKENDS)
         return parser
 
     @staticmethod
     def show_help(help_generator):
         # cli_pager(help_formatter.format_page() + '\n')
-        cli_pager('\n'.join(list(help_generator.get_help())) + '\n')
+        return AlertLogicCLI.show_help_text(render_help(help_generator))
+
+    @staticmethod
+    def show_help_text(text):
+        with timer.phase('help'):
+            cli_pager(text)
         return 0
 
 
@@ -170,14 +372,19 @@ class ServiceOperation(object):
         A service operation. For example: alcli aetuner would create
         a ServiceOperation object for aetuner service
     """
-    def __init__(self, name):
+    def __init__(self, name, spec_index=None):
         self._name = name
+        self._spec_index = spec_index
         self._client= None
         #self._service = None
         self._description = None
         self._operations = None
+        self._token_key = None
+        self._sessions = None
+        self._encoder_plans = {}
 
     def __call__(self, args, parsed_globals):
+        import almdrlib
         operation_name = ""
         kwargs = {}
         for name, value in parsed_globals.__dict__.items():
@@ -193,28 +400,96 @@ class ServiceOperation(object):
             else:
                 kwargs[name] = value
 
-        service = self._init_service(parsed_globals)
-        operation = service.operations.get(operation_name, None)
-        if operation:
-            # Remove optional arguments that haven't been supplied
-            op_args = {k:self._encode(operation, k, v) for (k,v) in kwargs.items() if v is not None}
-            res = operation(**op_args)
+        if parsed_globals.account_ids:
+            from alcli.fanout import fan_out
+            return fan_out(self, operation_name, kwargs, parsed_globals)
+
+        with timer.phase('init_service'):
+            service = self._init_service(parsed_globals)
+        if parsed_globals.paginate:
+            return self._paginate(service, operation_name, kwargs, parsed_globals)
+
+        try:
+            res = self.invoke(service, operation_name, kwargs,
+                              cache=get_response_cache(parsed_globals))
+        except Exception as e:
+            self._invalidate(e)
+            raise
+        if res is not None:
             content_type = res.headers.get('content-type')
-            json_content_types = ['application/json', 'alertlogic/json']
-            if content_type and content_type not in json_content_types:
+            if content_type and content_type not in JSON_CONTENT_TYPES:
                 print(res.text)
             else:
                 try:
-                    self._print_result(res.json(), parsed_globals.query)
+                    with timer.phase('decode'):
+                        result = json_codec.loads_response(res)
+                    self._print_result(result, parsed_globals.query,
+                                       parsed_globals.output_format)
                 except json.decoder.JSONDecodeError:
                     print(f'HTTP Status Code: {res.status_code}\n{res.text}')
 
+    def invoke(self, service, operation_name, kwargs, cache=None):
+        """
+            Encode kwargs and call operation_name on the service client.
+            Returns the HTTP response, or None if there is no such operation.
+            Responses to read only operations are looked up in and added
+            to cache, if it's given
+        """
+        operation = service.operations.get(operation_name, None)
+        if not operation:
+            return None
+
+        # Remove optional arguments that haven't been supplied
+        with timer.phase('encode'):
+            plan = self._get_encoder_plan(operation_name, operation)
+            op_args = {k:plan.encode(k, v) for (k,v) in kwargs.items() if v is not None}
+        key = None
+        stale = None
+        if cache is not None and cache.cacheable(operation):
+            key = cache.make_key(service, operation_name, op_args)
+            res, stale = cache.get(key)
+            if res is not None:
+                return res
+            if stale is not None:
+                # Operations merge 'headers' into the request headers
+                op_args['headers'] = cache.validators(stale)
+
+        # Operations pop the values they serialize, keep them to be closed
+        values = list(op_args.values())
+        with timer.phase('request'), \
+                tracer.operation(service.name, operation_name,
+                                 getattr(operation, '_path', None)):
+            try:
+                res = operation(**op_args)
+            finally:
+                close_file_values(values)
+        if key is not None:
+            res = cache.put(key, service.name, operation_name, res, stale)
+        return res
+
+    @staticmethod
+    def decode_response(res):
+        """
+            Returns decoded JSON response body,
+            or response text for other content types
+        """
+        content_type = res.headers.get('content-type')
+        if content_type and content_type not in JSON_CONTENT_TYPES:
+            return res.text
+        with timer.phase('decode'):
+            return json_codec.loads_response(res)
+
     def get_service_api(self, service_name):
+        from almdrlib.session import Session
         return Session.get_service_api(service_name=service_name)
 
+    def get_operations_index(self):
+        return self._spec_index.get_operations(self._name)
+
     @property
     def client(self):
         if self._client is None:
+            from almdrlib.client import Client
             self._client = Client(self._name)
         return self._client
 
@@ -234,93 +509,77 @@ class ServiceOperation(object):
             self._operations = self.client.operations
         return self._operations
 
+    def create_client(self, session):
+        import almdrlib
+        return almdrlib.client(self._name, session=session)
+
+    def use_sessions(self, sessions):
+        """ Take sessions and clients from an ALCliSessionCache """
+        self._sessions = sessions
+
     def _init_service(self, parsed_globals):
+        if self._sessions is not None:
+            client, self._token_key = self._sessions.get_client(
+                    self, parsed_globals)
+            return client
         account_id = None
         if hasattr(parsed_globals, 'account_id'):
             account_id = parsed_globals.account_id
-
-        return almdrlib.client(
-                self._name,
-                access_key_id=parsed_globals.access_key_id,
-                secret_key=parsed_globals.secret_key,
-                account_id=account_id,
-                profile=parsed_globals.profile,
-                global_endpoint=parsed_globals.global_endpoint,
-                residency=\
-                        parsed_globals.residency and \
-                        parsed_globals.residency or "default"
-        )
-
-    def _encode(self, operation, param_name, param_value):
-        if isinstance(param_value, str):
-            p = urlparse(param_value)
-            if p.scheme == "file":
-                value_file_path = os.path.abspath(os.path.join(p.netloc, p.path))
-                with open(value_file_path, "r") as value_file:
-                    param_value = value_file.read()
-
-        schema = operation.get_schema()
-        parameter = schema[OpenAPIKeyWord.PARAMETERS][param_name]
-        parameter_type = parameter.get(OpenAPIKeyWord.TYPE)
-        oneof = parameter.get(OpenAPIKeyWord.ONE_OF)
-        anyof = parameter.get(OpenAPIKeyWord.ANY_OF)
-        allof = parameter.get(OpenAPIKeyWord.ALL_OF)
-
-        if oneof or anyof or allof:
-            # Attempt to find type in the decomposed schema
-            find_type = [t.get('type') for t in allof or anyof or oneof if t.get('type')]
-            parameter_type = find_type[0] if find_type else None
-
-        if not parameter_type:
-            # If failed to figure parameter_type out, fallback to object
-            parameter_type = OpenAPIKeyWord.OBJECT
-
-        if parameter_type in OpenAPIKeyWord.SIMPLE_DATA_TYPES:
-            return param_value
-
-        if parameter_type == OpenAPIKeyWord.ARRAY:
-            items_type = ALCliParserUtils.detect_array_items_type(schema.get('items', {}))
-            if items_type in OpenAPIKeyWord.SIMPLE_DATA_TYPES:
-                return param_value
-            else:
-                try:
-                    return json.loads(param_value)
-                except JSONDecodeError as e:
-                    import textwrap
-                    bad_input_lines = param_value.split('\n')
-                    bad_input_lines.insert(e.lineno, ' ' * (e.colno - 1) + "^ ERROR")
-                    explainer = '\n'.join(bad_input_lines)
-                    explainer = textwrap.indent(explainer, '    ')
-                    logger.error(f"Unable to parse input as JSON.  "
-                                 f"Line {e.lineno}, column {e.colno}: {e.msg}\n"
-                                 f"Input:\n{explainer}\nFalling back to using the input as a string.")
-
-        if parameter_type in OpenAPIKeyWord.OBJECT:
+        session, self._token_key = create_session(parsed_globals, account_id)
+        return self.create_client(session)
+
+    def _invalidate(self, error):
+        invalidate_token(self._token_key, error)
+        if self._sessions is not None:
+            self._sessions.invalidate(error)
+
+    def _get_encoder_plan(self, operation_name, operation):
+        """
+            Encoders of operation's parameters, built on first use and
+            shared by every call, e.g. batch jobs and fanned out accounts
+        """
+        plan = self._encoder_plans.get(operation_name)
+        if plan is None:
+            with timer.phase('encoder_plan'):
+                plan = EncoderPlan(operation)
+            self._encoder_plans[operation_name] = plan
+        return plan
+
+    def _paginate(self, service, operation_name, kwargs, parsed_globals):
+        from alcli.pagination import Paginator
+        if operation_name not in service.operations:
+            return
+
+        cache = get_response_cache(parsed_globals)
+
+        def fetch(page_kwargs):
             try:
-                return json.loads(param_value)
-            except JSONDecodeError as e:
-                #
-                # this could be an argument encoded using a short form such as
-                # key1=value,key2=value2
-                #
-                regex = re.compile(
-                        '(?P<pair>(?P<key>.+?)(?:=)(?P<value>[^=]+)(?:,|$))')
-                result = dict(
-                    (m.groupdict()['key'], m.groupdict()['value'])
-                    for m in regex.finditer(param_value)
-                )
-                if result:
-                    return result
-                else:
-                    return param_value
-
-        # TODO Raise an exception if we can't build a dictionary from the provided input
-        return param_value
+                res = self.invoke(service, operation_name, page_kwargs, cache)
+            except Exception as e:
+                self._invalidate(e)
+                raise
+            return self.decode_response(res)
+
+        operation_index = self.get_operations_index().get(operation_name, {})
+        paginator = Paginator(
+                operation_index.get('parameters', {}),
+                page_size=parsed_globals.pagination_page_size,
+                max_items=parsed_globals.max_items)
+        self._print_items(paginator.items(fetch, kwargs), parsed_globals.query,
+                          parsed_globals.output_format)
+
+    def _print_items(self, items, query, output_format=None):
+        """ Stream items, writing each one as soon as it's available """
+        if query:
+            items = (search(query, item) for item in items)
+        get_writer(output_format).write_items(items)
 
-    def _print_result(self, result, query):
+    def _print_result(self, result, query, output_format=None):
         if query:
-            result = jmespath.search(query, result)
-        print(f"{json.dumps(result, sort_keys=True, indent=4)}")
+            with timer.phase('query'):
+                result = search(query, result)
+        with timer.phase('output'):
+            get_writer(output_format).write(result)
 
 
 def main():
@@ -331,7 +590,7 @@ def main():
         logging.basicConfig(level=logging.ERROR)
 
     cli= AlertLogicCLI()
-    cli.main()
+    sys.exit(cli.main())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import logging
+from contextlib import nullcontext
+
+from alcli.jsoncodec import json_codec
+from alcli.tokencache import create_session
+from alcli.concurrency import OperationRunner
+from alcli.responsecache import get_response_cache
+from alcli.concurrency import ORDER_INPUT
+from alcli.concurrency import execute
+
+logger = logging.getLogger('alcli.batch')
+
+
+def open_input(file_path):
+    """ File at file_path, or stdin for '-', left open on exit """
+    if file_path == '-':
+        return nullcontext(sys.stdin)
+    return open(file_path, 'r')
+
+
+class BatchCommand(object):
+    """
+        alcli batch --file ops.jsonl
+
+        Executes operations listed in a JSON lines file, one per line:
+            {"service": "aims", "operation": "get_account_details",
+             "parameters": {"account_id": "12345678"}}
+
+        All operations share a single authenticated session, and therefore
+        its HTTP connection pool. With --concurrency N operations run on N
+        worker threads, rate limited per service with --rate_limit.
+        Results are streamed to stdout as JSON lines, in input order unless
+        --order completion is given:
+            {"line": 1, "status": 200, "body": {...}}
+            {"line": 2, "status": 404, "error": "...", "body": {...}}
+    """
+
+    name = 'batch'
+
+    def __init__(self, services):
+        self._services = services
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', dest='file', required=True,
+                            help="JSON lines file with operations, '-' for stdin")
+
+    def __call__(self, args, parsed_globals):
+        try:
+            input_context = open_input(parsed_globals.file)
+        except OSError as e:
+            sys.stderr.write(f"Unable to read --file: {e}\n")
+            return 255
+
+        session, token_key = create_session(parsed_globals)
+        runner = OperationRunner(session, token_key,
+                                 rate_limit=parsed_globals.rate_limit,
+                                 query=parsed_globals.query,
+                                 cache=get_response_cache(parsed_globals))
+
+        def execute_line(numbered_line):
+            line_number, line = numbered_line
+            return self.execute(runner, line_number, line)
+
+        failed = 0
+        with input_context as input_file:
+            lines = ((n, line) for n, line in enumerate(input_file, 1)
+                     if line.strip())
+            for result in execute(execute_line, lines,
+                                  concurrency=parsed_globals.concurrency,
+                                  order=parsed_globals.results_order or ORDER_INPUT):
+                if result.get('error') is not None:
+                    failed += 1
+                write_result(result)
+
+        return 255 if failed else 0
+
+    def execute(self, runner, line_number, line):
+        """ Execute a single batch line. Never raises, errors are reported """
+        result = {'line': line_number, 'status': None}
+        try:
+            request = json_codec.loads(line)
+            service_name = request['service']
+            operation_name = request['operation']
+            parameters = request.get('parameters', {})
+        except (ValueError, KeyError, TypeError) as e:
+            result['error'] = f"Invalid batch line: {e!r}"
+            return result
+
+        result.update({'service': service_name, 'operation': operation_name})
+        service = self._services.get(service_name)
+        if service is None:
+            result['error'] = f"Unknown service '{service_name}'"
+            return result
+
+        return runner.run(service, operation_name, parameters, result)
+
+
+def write_result(result):
+    sys.stdout.write(json.dumps(result) + '\n')
+    sys.stdout.flush()
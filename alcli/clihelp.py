@@ -7,11 +7,6 @@ import json
 import textwrap
 import itertools
 import shutil
-from almdrlib.session import Session
-from almdrlib.region import Region
-from almdrlib.region import Residency
-from almdrlib.docs.service import get_param_spec
-from almdrlib.docs.service import format_json
 
 def get_param_type(spec):
     type = spec.get('type')
@@ -132,12 +127,16 @@ class ALCliHelpFormatter():
 class ALCliMainHelpFormatter(ALCliHelpFormatter):
     def __init__(self,
                 services,
+                global_endpoints,
+                residencies,
                 width=80,
                 indent_increment=2
                 ):
         super().__init__(width, indent_increment)
         self.name = "alcli"
-        self._services = services 
+        self._services = services
+        self._global_endpoints = global_endpoints
+        self._residencies = residencies
         self.description = (
                 "The Alert Logic Command  Line  Interface is a tool "
                 "to help you manage Alert Logic Services."
@@ -168,11 +167,163 @@ class ALCliMainHelpFormatter(ALCliHelpFormatter):
         yield '\tA JMESPath query to use in filtering the response data.'
         yield ''
 
+        yield f'\t{self.bold("--timing")} (boolean)'
+        yield ''
+        yield '\tPrint a breakdown of time spent in each phase of the command to stderr.'
+        yield '\tCan also be enabled by setting ALCLI_TIMING environment variable.'
+        yield ''
+
+        yield f'\t{self.bold("--timing_file")} (string)'
+        yield ''
+        yield '\tWrite the timing breakdown as a JSON document to the given file.'
+        yield '\tCan also be set with ALCLI_TIMING_FILE environment variable.'
+        yield ''
+
+        yield f'\t{self.bold("--trace_file")} (string)'
+        yield ''
+        yield '\tAppend a span per HTTP request, with its status, sizes, retries'
+        yield '\tand DNS, connect, TLS and first byte times, to the given file'
+        yield '\tas a line of OpenTelemetry OTLP JSON.'
+        yield '\tCan also be set with ALCLI_TRACE_FILE environment variable.'
+        yield ''
+
+        yield f'\t{self.bold("--json_backend")} (string)'
+        yield ''
+        yield '\tDecoder of JSON responses: auto, json or orjson. auto uses orjson'
+        yield '\tfor large responses when it is installed, json otherwise.'
+        yield '\tCan also be set with ALCLI_JSON_BACKEND environment variable.'
+        yield ''
+
+        yield f'\t{self.bold("--profile_cpu")} (string)'
+        yield ''
+        yield '\tRun the command under cProfile and write pstats data to the given file.'
+        yield ''
+
+        yield f'\t{self.bold("--profile_mem")} (string)'
+        yield ''
+        yield '\tRun the command under tracemalloc and write peak memory usage and'
+        yield '\ttop allocation sites to the given file. The raw snapshot is saved'
+        yield '\tnext to it with .snapshot extension.'
+        yield ''
+
+        yield f'\t{self.bold("--concurrency")} (integer)'
+        yield ''
+        yield '\tNumber of operations to run in parallel in batch and fan-out modes.'
+        yield ''
+
+        yield f'\t{self.bold("--rate_limit")} (number)'
+        yield ''
+        yield '\tMaximum number of requests per second sent to each service.'
+        yield '\tRequests still throttled by the server after --retries pause'
+        yield '\tthe service for Retry-After seconds.'
+        yield ''
+
+        yield f'\t{self.bold("--order")} (string)'
+        yield ''
+        yield '\tOrder of results in batch and fan-out modes. Batch results are'
+        yield '\twritten in input order and fan-out results as they complete by default.'
+        yield ''
+        yield '\to input'
+        yield ''
+        yield '\to completion'
+        yield ''
+
+        yield f'\t{self.bold("--paginate")} (boolean)'
+        yield ''
+        yield '\tFollow continuation tokens or offset/limit pages of list operations'
+        yield '\tand stream the items of every page as they arrive. --query is'
+        yield '\tapplied to each item.'
+        yield ''
+
+        yield f'\t{self.bold("--max_items")} (integer)'
+        yield ''
+        yield '\tStop paginating after this many items.'
+        yield ''
+
+        yield f'\t{self.bold("--page_size")} (integer)'
+        yield ''
+        yield '\tNumber of items requested per page, with --paginate. Only applies'
+        yield '\tto operations taking a limit parameter, ignored by others.'
+        yield ''
+
+        yield f'\t{self.bold("--output")} (string)'
+        yield ''
+        yield '\tOutput format. json is indented with sorted keys, json-compact'
+        yield '\tis written on a single line and ndjson writes each element of'
+        yield '\ta top level array on its own line as soon as it is available.'
+        yield '\ttable, csv and tsv write a row per element of a top level array,'
+        yield '\twith columns taken from the keys of the first elements.'
+        yield ''
+        yield '\to json'
+        yield ''
+        yield '\to json-compact'
+        yield ''
+        yield '\to ndjson'
+        yield ''
+        yield '\to table'
+        yield ''
+        yield '\to csv'
+        yield ''
+        yield '\to tsv'
+        yield ''
+
+        yield f'\t{self.bold("--cache_ttl")} (integer)'
+        yield ''
+        yield '\tReuse responses of read only operations cached on disk by a previous'
+        yield '\tcall less than this many seconds ago, and cache new ones.'
+        yield '\tUse alcli cache clear|stats to manage the cache.'
+        yield ''
+
+        yield f'\t{self.bold("--connect_timeout")} (number)'
+        yield ''
+        yield '\tSeconds to wait for a connection to be established.'
+        yield '\tDefaults to the read timeout.'
+        yield ''
+
+        yield f'\t{self.bold("--read_timeout")} (number)'
+        yield ''
+        yield '\tSeconds to wait for a response. Defaults to 300.'
+        yield ''
+
+        yield f'\t{self.bold("--retries")} (integer)'
+        yield ''
+        yield '\tTimes idempotent requests are retried after connection errors'
+        yield '\tand 429, 500, 502, 503 or 504 responses. Defaults to 5.'
+        yield ''
+
+        yield f'\t{self.bold("--retry_backoff")} (number)'
+        yield ''
+        yield '\tBackoff factor in seconds. Retries wait a random time up to'
+        yield '\tretry_backoff * 2 ^ (retry - 1) seconds. Defaults to 1.'
+        yield ''
+
+        yield f'\t{self.bold("--pool_size")} (integer)'
+        yield ''
+        yield '\tConnections kept open per host, at least --concurrency.'
+        yield '\tDefaults to 10.'
+        yield ''
+
+        yield f'\t{self.bold("--keep_alive")} (string)'
+        yield ''
+        yield '\tReuse connections between requests. Defaults to true.'
+        yield ''
+        yield '\to true'
+        yield ''
+        yield '\to false'
+        yield ''
+
+        yield f'\t{self.bold("--account_ids")} (string)'
+        yield ''
+        yield '\tRun the operation for each of the listed accounts in parallel.'
+        yield '\tEither a comma separated list of account ids, or @<file> with'
+        yield '\tone account id per line.'
+        yield ''
+
         yield f'\t{self.bold("--global_endpoint")} (string)'
         yield ''
         yield f'\tUse specific Alert Logic backend.'
         yield ''
-        for endpoint in Region.list_endpoints():
+        for endpoint in self._global_endpoints:
             yield f'\to {endpoint}'
             yield ''
 
@@ -180,7 +331,7 @@ class ALCliMainHelpFormatter(ALCliHelpFormatter):
         yield ''
         yield f'\tUse a specific data residency.'
         yield ''
-        for residency in Residency.list_residencies():
+        for residency in self._residencies:
             yield f'\to {residency}'
             yield ''
 
@@ -352,6 +503,8 @@ class ALCliOperationHelpFormatter(ALCliHelpFormatter):
 
         elif type == 'object':
             if declare and param_type == 'request':
+                from almdrlib.docs.service import get_param_spec
+                from almdrlib.docs.service import format_json
                 yield ''
                 yield f'{indent}JSON Syntax:'
                 yield ''
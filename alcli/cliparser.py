@@ -1,7 +1,6 @@
 import sys
 import argparse
 from difflib import get_close_matches
-from almdrlib.client import OpenAPIKeyWord
 
 HELP_MESSAGE = (
     "To see help text, you can run:\n"
@@ -10,12 +9,34 @@ HELP_MESSAGE = (
     "  alcli <command> help\n"
     "  alcli <command> <subcommand> help\n"
 )
+# Global option running an operation for many accounts. When it's given,
+# operations' account_id parameter is not required
+FAN_OUT_OPTION = '--account_ids'
+FAN_OUT_PARAMETERS = ['account_id']
+
 USAGE = (
     "alcli [options] <command> <subcommand> [<subcommand> ...] [parameters]\n"
     f"{HELP_MESSAGE}"
 )
 
 
+class OpenAPIKeyWord(object):
+    """
+        Subset of alsdkdefs.OpenAPIKeyWord needed to build the parsers,
+        spelled out so that parsing doesn't import the SDK
+    """
+    STRING = "string"
+    OBJECT = "object"
+    BOOLEAN = "boolean"
+    INTEGER = "integer"
+    ARRAY = "array"
+    NUMBER = "number"
+    ONE_OF = "oneOf"
+    ANY_OF = "anyOf"
+    ALL_OF = "allOf"
+    SIMPLE_DATA_TYPES = [STRING, BOOLEAN, INTEGER, NUMBER]
+
+
 class ALCliParserUtils(object):
     OpenApiToNativeMap = {
         OpenAPIKeyWord.STRING: str,
@@ -60,6 +81,16 @@ class CliArgParserBase(argparse.ArgumentParser):
     # Number of choices per line
     ChoicesPerLine = 2
 
+    # ALCliSearchIndex suggesting services and operations close to
+    # invalid choices, once it's been built
+    search_index = None
+
+    def get_close_choices(self, action, value, choices):
+        if action.dest in ['service', 'operation'] and \
+                self.search_index is not None and self.search_index.exists():
+            return self.search_index.suggest(value, choices)
+        return get_close_matches(value, choices, cutoff=0.8)
+
     def _check_value(self, action, value):
         # converted value must be one of the choices (if specified)
         if isinstance(action.choices, dict):
@@ -76,7 +107,7 @@ class CliArgParserBase(argparse.ArgumentParser):
                 for choice in choices[i:i+self.ChoicesPerLine]:
                     current.append('%-40s' % choice)
                 msg.append(' | '.join(current))
-            possible = get_close_matches(value, choices, cutoff=0.8)
+            possible = self.get_close_choices(action, value, choices)
             if possible:
                 extra = ['\n\nInvalid choice: %r, maybe you meant:\n' % value]
                 for word in possible:
@@ -84,12 +115,32 @@ class CliArgParserBase(argparse.ArgumentParser):
                 msg.extend(extra)
             raise argparse.ArgumentError(action, '\n'.join(msg))
 
+    def _peek_command(self, args):
+        """
+            Returns the first positional argument in args, skipping over
+            options known to this parser and their values
+        """
+        skip_value = False
+        for arg in args:
+            if skip_value:
+                skip_value = False
+                continue
+            if arg == '--':
+                return None
+            if arg.startswith('-'):
+                action = self._option_string_actions.get(arg)
+                skip_value = action is not None and action.nargs != 0
+                continue
+            return arg
+        return None
+
 class ALCliArgsParser(CliArgParserBase):
     """
         Main CLI Arguments Parser 
     """
 
-    def __init__(self, services, version, description, prog=None):
+    def __init__(self, services, commands, version, description, prog=None,
+                 search_index=None):
         super().__init__(
                 formatter_class=argparse.RawTextHelpFormatter,
                 add_help=False,
@@ -109,20 +160,56 @@ class ALCliArgsParser(CliArgParserBase):
                 title='service',
                 parser_class=ServicesArgsParser,
                 required=False)
-        self._create_parsers(services)
+        self._services = services
+        self._commands = commands
+        self.search_index = search_index
 
     def parse_known_args(self, args=None, namespace=None):
+        if args is None:
+            args = sys.argv[1:]
+        fan_out = any(arg == FAN_OUT_OPTION or arg.startswith(f"{FAN_OUT_OPTION}=")
+                      for arg in args)
+        self._create_parsers(
+                self._services, self._commands, self._peek_command(args),
+                optional_parameters=FAN_OUT_PARAMETERS if fan_out else [])
         parsed_args, remaining = super().parse_known_args(args, namespace)
         # print(f"ALCliArgsParser:parse_known_args returning {parsed_args}, {remaining}")
         return parsed_args, remaining
 
     #
-    # For all know services, create a subparser
+    # Create a subparser for the requested command or service only.
+    # Subparsers for all known services are needed only to report
+    # an invalid choice
     #
-    def _create_parsers(self, services):
-        self._subparsers.add_parser('help', service=None)
+    def _create_parsers(self, services, commands, service_name=None,
+                        optional_parameters=None):
+        optional_parameters = optional_parameters or []
+        help_parser = self._subparsers.add_parser(
+                'help', service=None, search_index=self.search_index)
+        help_parser.add_argument('--prebuild', dest='prebuild', default=False,
+                                 action="store_true")
+        if service_name in commands:
+            self._subparsers.add_parser(
+                    service_name, service=None, command=commands[service_name],
+                    search_index=self.search_index)
+            return
+
+        if service_name in services:
+            self._subparsers.add_parser(
+                    service_name, service=services[service_name],
+                    optional_parameters=optional_parameters,
+                    search_index=self.search_index)
+            return
+
+        for name, command in commands.items():
+            self._subparsers.add_parser(
+                    name, service=None, command=command,
+                    search_index=self.search_index)
         for name, service in services.items():
-            self._subparsers.add_parser(name, service=service)
+            self._subparsers.add_parser(
+                    name, service=service,
+                    optional_parameters=optional_parameters,
+                    search_index=self.search_index)
 
 class ServicesArgsParser(CliArgParserBase):
     """
@@ -131,6 +218,9 @@ class ServicesArgsParser(CliArgParserBase):
 
     def __init__(self, *args, **kwargs):
         self._service = kwargs.pop('service')
+        self._command = kwargs.pop('command', None)
+        self._optional_parameters = kwargs.pop('optional_parameters', [])
+        self.search_index = kwargs.pop('search_index', None)
         super().__init__(
                 formatter_class = argparse.RawTextHelpFormatter,
                 add_help=False,
@@ -138,13 +228,17 @@ class ServicesArgsParser(CliArgParserBase):
                 usage=USAGE)
         
     def parse_known_args(self, args=None, namespace=None):
+        if self._command is not None:
+            self._command.add_arguments(self)
+            return super().parse_known_args(args, namespace)
+
         #
         # Get Service API Schema
         #
         if self._service is None:
             return super().parse_known_args(args, namespace)
 
-        service_api = self._service.get_service_api(self._service.name)
+        operations = self._service.get_operations_index()
 
         self._required=True
         subparsers = self.add_subparsers(
@@ -154,10 +248,19 @@ class ServicesArgsParser(CliArgParserBase):
                 parser_class=OperationArgsParser)
 
         #
-        # Add subparsers for all service operations
+        # Add subparser for the requested operation, or for all
+        # service operations if it isn't known
         #
-        for op_name, op_spec in service_api['operations'].items():
-            operation_parser = subparsers.add_parser(op_name, spec=op_spec)
+        op_name = self._peek_command(args)
+        if op_name in operations:
+            subparsers.add_parser(
+                    op_name, spec=operations[op_name],
+                    optional_parameters=self._optional_parameters)
+        else:
+            for op_name, op_spec in operations.items():
+                subparsers.add_parser(
+                        op_name, spec=op_spec,
+                        optional_parameters=self._optional_parameters)
         
         #
         # Add help command
@@ -173,19 +276,20 @@ class OperationArgsParser(CliArgParserBase):
 
     def __init__(self, *args, **kwargs):
         self._spec = kwargs.pop('spec')
+        self._optional_parameters = kwargs.pop('optional_parameters', [])
         super().__init__(
             formatter_class=argparse.RawTextHelpFormatter,
             add_help=False,
             conflict_handler='resolve',
             usage=USAGE)
 
-    def make_parameter_argument(self, schema):
-        type = schema.get(OpenAPIKeyWord.TYPE)
-        required = schema.get(OpenAPIKeyWord.REQUIRED, False)
-        default = schema.get(OpenAPIKeyWord.DEFAULT, None)
-        parser_type = ALCliParserUtils.oapi_type_to_native(schema.get('type'))
+    def make_parameter_argument(self, descriptor):
+        type = descriptor.get('type')
+        required = descriptor.get('required', False)
+        default = descriptor.get('default', None)
+        parser_type = ALCliParserUtils.oapi_type_to_native(type)
         if type == 'array':
-            items_type = ALCliParserUtils.detect_array_items_type(schema.get('items', {}))
+            items_type = descriptor.get('items_type')
             if items_type in OpenAPIKeyWord.SIMPLE_DATA_TYPES:
                 return {'nargs': '+', 'type': ALCliParserUtils.oapi_type_to_native(items_type), 'required': required,
                         'default': default}
@@ -202,8 +306,10 @@ class OperationArgsParser(CliArgParserBase):
             self.add_argument('help')
             return super().parse_known_args(args, namespace)
         elif self._spec is not None:
-            for name, schema in self._spec[OpenAPIKeyWord.PARAMETERS].items():
-                kwargs = self.make_parameter_argument(schema)
+            for name, descriptor in self._spec['parameters'].items():
+                kwargs = self.make_parameter_argument(descriptor)
+                if name in self._optional_parameters:
+                    kwargs['required'] = False
                 self.add_argument(f"--{name}", **kwargs)
         return super().parse_known_args(args, namespace)
 
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Shell completion of alcli command lines. Candidates are looked up in a
+# flat index of options, commands, services, operations and parameters,
+# built once from the spec index. Only standard library modules are
+# imported to answer a completion, the SDK is loaded just to (re)build
+# the index
+#
+import os
+import sys
+import json
+
+COMPLETION_INDEX_FILE = 'completion.json'
+
+# Bump whenever the layout of the completion index changes
+COMPLETION_INDEX_VERSION = 1
+
+HELP = 'help'
+BOOLEAN_VALUES = ['true', 'false']
+SHELLS = ['bash', 'zsh', 'fish']
+
+BASH_SCRIPT = """\
+_alcli_complete() {{
+    local IFS=$'\\n'
+    COMPREPLY=( $({command} "${{COMP_WORDS[@]:1:COMP_CWORD}}" 2>/dev/null) )
+}}
+complete -o default -F _alcli_complete alcli alcli-client
+"""
+
+ZSH_SCRIPT = """\
+_alcli() {{
+    local -a candidates
+    candidates=( ${{(f)"$({command} "${{(@)words[2,CURRENT]}}" 2>/dev/null)"}} )
+    compadd -a candidates
+}}
+compdef _alcli alcli alcli-client
+"""
+
+FISH_SCRIPT = """\
+function __alcli_complete
+    set -l words (commandline -opc) (commandline -ct)
+    {command} $words[2..-1] 2>/dev/null
+end
+complete -c alcli -f -a '(__alcli_complete)'
+complete -c alcli-client -f -a '(__alcli_complete)'
+"""
+
+SCRIPTS = {
+    'bash': BASH_SCRIPT,
+    'zsh': ZSH_SCRIPT,
+    'fish': FISH_SCRIPT
+}
+
+
+class CompletionCommand(object):
+    """
+        alcli completion bash|zsh|fish
+
+        Writes a script enabling tab completion of alcli commands,
+        services, operations, parameters and their values. For example:
+            eval "$(alcli completion bash)"
+            alcli completion fish > ~/.config/fish/completions/alcli.fish
+
+        The completion index is built, or rebuilt after an upgrade,
+        before the script is written
+    """
+
+    name = 'completion'
+
+    def __init__(self, cli):
+        self._cli = cli
+
+    def add_arguments(self, parser):
+        parser.add_argument('shell', choices=SHELLS)
+
+    def __call__(self, args, parsed_globals):
+        import shlex
+        if load_completion_index() is None:
+            write_completion_index(self._cli)
+        command = f"{shlex.quote(sys.executable)} -m alcli.completion"
+        sys.stdout.write(SCRIPTS[parsed_globals.shell].format(command=command))
+        return 0
+
+
+def get_index_path():
+    cache_dir = os.environ.get('ALCLI_CACHE_DIR')
+    if not cache_dir:
+        from alcli.specindex import get_cache_dir
+        cache_dir = get_cache_dir()
+    return os.path.join(cache_dir, COMPLETION_INDEX_FILE)
+
+
+def get_alcli_version():
+    try:
+        from alcli.version import version
+    except ImportError:
+        return None
+    return version
+
+
+def make_option_values(action):
+    """ None for flags, otherwise the option's choices if it has any """
+    if action.nargs == 0:
+        return None
+    return [str(choice) for choice in action.choices or []]
+
+
+def get_options(parser):
+    return {
+        option: make_option_values(action)
+        for option, action in parser._option_string_actions.items()
+        if option.startswith('--')
+    }
+
+
+def get_positional_choices(parser):
+    return [
+        str(choice) for action in parser._actions
+        if not action.option_strings for choice in action.choices or []
+    ]
+
+
+def make_parameter_values(descriptor):
+    if descriptor.get('enum'):
+        return [str(value) for value in descriptor['enum']]
+    if descriptor['type'] == 'boolean':
+        return BOOLEAN_VALUES
+    return []
+
+
+def build_completion_index(cli):
+    """
+        Flat completion index:
+        {
+            'options': {option: values or None for flags},
+            'commands': {
+                command: {
+                    'options': {option: values or None},
+                    'choices': [positional argument values]
+                }
+            },
+            'services': {service: {operation: {parameter: values}}}
+        }
+    """
+    import argparse
+    spec_index = cli.spec_index
+    commands = {}
+    for name, command in cli._get_commands().items():
+        parser = argparse.ArgumentParser(add_help=False)
+        command.add_arguments(parser)
+        commands[name] = {
+            'options': get_options(parser),
+            'choices': get_positional_choices(parser)
+        }
+
+    return {
+        'version': COMPLETION_INDEX_VERSION,
+        'alcli_version': get_alcli_version(),
+        'spec_index_dir': spec_index.index_dir,
+        'options': get_options(cli.create_parser()),
+        'commands': commands,
+        'services': {
+            service_name: {
+                op_name: {
+                    name: make_parameter_values(descriptor)
+                    for name, descriptor in op_index['parameters'].items()
+                }
+                for op_name, op_index in spec_index.get_operations(service_name).items()
+            }
+            for service_name in spec_index.list_services()
+        }
+    }
+
+
+def write_completion_index(cli):
+    import tempfile
+    index = build_completion_index(cli)
+    path = get_index_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as index_file:
+            json.dump(index, index_file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        sys.stderr.write(f"Unable to write completion index '{path}': {e}\n")
+    return index
+
+
+def load_completion_index():
+    """
+        The completion index, or None if it's missing or was built for
+        other versions of alcli or of the spec index
+    """
+    try:
+        with open(get_index_path(), 'r') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+
+    # The spec index directory is keyed by alsdkdefs and almdrlib versions,
+    # and removed once it's rebuilt for others
+    if index.get('version') != COMPLETION_INDEX_VERSION or \
+            index.get('alcli_version') != get_alcli_version() or \
+            not os.path.isdir(index.get('spec_index_dir', '')):
+        return None
+    return index
+
+
+def get_completion_index():
+    index = load_completion_index()
+    if index is None:
+        from alcli.alertlogic_cli import AlertLogicCLI
+        index = write_completion_index(AlertLogicCLI())
+    return index
+
+
+def get_candidates(index, words):
+    """ Possible next words of a command line starting with words """
+    options = index['options']
+    position = 0
+    while position < len(words) and words[position].startswith('-'):
+        if options.get(words[position]) is not None:
+            if position + 1 == len(words):
+                return options[words[position]]
+            position += 1
+        position += 1
+
+    if position == len(words):
+        return sorted(list(options) + list(index['services']) +
+                      list(index['commands']) + [HELP])
+
+    name = words[position]
+    arguments = words[position + 1:]
+    command = index['commands'].get(name)
+    if command is not None:
+        candidates = get_option_candidates(command['options'], arguments)
+        if not any(choice in arguments for choice in command['choices']) and \
+                not (arguments and command['options'].get(arguments[-1]) is not None):
+            candidates = sorted(candidates + command['choices'])
+        return candidates
+
+    operations = index['services'].get(name)
+    if operations is None:
+        return []
+    if not arguments:
+        return sorted(list(operations) + [HELP])
+
+    parameters = operations.get(arguments[0])
+    if parameters is None:
+        return []
+    return get_option_candidates(
+            {f"--{name}": values for name, values in parameters.items()},
+            arguments[1:])
+
+
+def get_option_candidates(options, arguments):
+    """ Values of the last option in arguments, or options not given yet """
+    if arguments and options.get(arguments[-1]) is not None:
+        return options[arguments[-1]]
+    return sorted(option for option in options if option not in arguments)
+
+
+def complete(args):
+    """ Candidates for the last of args, the word being completed """
+    if not args:
+        return []
+    words, current = args[:-1], args[-1]
+    candidates = get_candidates(get_completion_index(), words)
+    return [c for c in candidates if c.startswith(current)]
+
+
+def main():
+    for candidate in complete(sys.argv[1:]):
+        sys.stdout.write(f"{candidate}\n")
+
+
+if __name__ == "__main__":
+    main()
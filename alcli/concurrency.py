@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from alcli.timing import timer
+from alcli.jsoncodec import json_codec
+from alcli.query import search
+from alcli.tokencache import invalidate_token
+
+logger = logging.getLogger('alcli.concurrency')
+
+ORDER_INPUT = 'input'
+ORDER_COMPLETION = 'completion'
+ORDERS = [ORDER_INPUT, ORDER_COMPLETION]
+
+# Tasks submitted ahead of the ones being executed, per worker
+QUEUE_DEPTH = 2
+
+
+class TokenBucket(object):
+    """
+        Token bucket allowing rate requests per second with bursts of up to
+        burst requests. A rate of None only enforces pauses requested by
+        the server through 429 responses
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self._rate = rate
+        self._capacity = burst or max(1, rate or 1)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                if delay <= 0:
+                    if not self._rate:
+                        return
+                    self._tokens = min(
+                        self._capacity,
+                        self._tokens + (now - self._updated) * self._rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    delay = (1 - self._tokens) / self._rate
+            time.sleep(delay)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(
+                    self._paused_until, time.monotonic() + seconds)
+
+
+class RateLimiter(object):
+    """
+        Per endpoint token buckets. Requests throttled by the server with
+        429 are retried by the transport, honouring Retry-After. Requests
+        still throttled once those retries are exhausted pause the whole
+        endpoint for Retry-After seconds
+    """
+
+    def __init__(self, rate=None):
+        self._rate = rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint):
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = TokenBucket(self._rate)
+                self._buckets[endpoint] = bucket
+            return bucket
+
+    def call(self, endpoint, fn, *args, **kwargs):
+        bucket = self.bucket(endpoint)
+        bucket.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if response is not None and response.status_code == 429:
+                delay = get_retry_after(response)
+                logger.debug(f"'{endpoint}' throttled, pausing for {delay}s")
+                timer.increment('throttled')
+                bucket.pause(delay)
+            raise
+
+
+class OperationRunner(object):
+    """
+        Runs service operations over a single shared session, from any
+        number of worker threads, and reports their outcome as a result
+        dictionary with HTTP status and body, or error.
+
+        Worker threads keep their own service clients, since an operation
+        call rewrites the client's server URL for the account it targets
+    """
+
+    def __init__(self, session, token_key=None, rate_limit=None, query=None,
+                 cache=None):
+        self._session = session
+        self._cache = cache
+        self._token_key = token_key
+        self._limiter = RateLimiter(rate_limit)
+        self._query = query
+        self._clients = threading.local()
+
+    def get_client(self, service):
+        clients = getattr(self._clients, 'clients', None)
+        if clients is None:
+            clients = self._clients.clients = {}
+        client = clients.get(service.name)
+        if client is None:
+            client = service.create_client(self._session)
+            clients[service.name] = client
+        return client
+
+    def run(self, service, operation_name, parameters, result):
+        """ Execute the operation and update result. Never raises """
+        result.setdefault('status', None)
+        try:
+            client = self.get_client(service)
+            res = self._limiter.call(service.name, service.invoke,
+                                     client, operation_name, parameters,
+                                     cache=self._cache)
+            if res is None:
+                result['error'] = f"Unknown operation '{operation_name}'"
+                return result
+            result['status'] = res.status_code
+            result['body'] = self.get_body(res, self._query)
+        except Exception as e:
+            invalidate_token(self._token_key, e)
+            response = getattr(e, 'response', None)
+            if response is not None:
+                result['status'] = response.status_code
+                result['body'] = self.get_body(response, None)
+            result['error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    @staticmethod
+    def get_body(res, query):
+        try:
+            body = json_codec.loads_response(res)
+        except ValueError:
+            return res.text or None
+        return search(query, body)
+
+
+def get_retry_after(response, default=1):
+    """ Seconds to wait as requested by Retry-After, or default """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+
+def execute(fn, items, concurrency=1, order=ORDER_INPUT):
+    """
+        Call fn for every item using up to concurrency worker threads and
+        yield results either in input or completion order.
+        Items are consumed lazily, so only a bounded number of tasks
+        and results are held in memory at any time
+    """
+    if concurrency <= 1:
+        for item in items:
+            yield fn(item)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import wait
+    from concurrent.futures import FIRST_COMPLETED
+
+    window = concurrency * QUEUE_DEPTH
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if order == ORDER_INPUT:
+            pending = deque()
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            pending = set()
+            for item in items:
+                pending.add(pool.submit(fn, item))
+                if len(pending) >= window:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import array
+import signal
+import socket
+import logging
+import threading
+import traceback
+import socketserver
+import _thread
+
+from alcli.timing import timer
+from alcli.daemonclient import FORWARDED_ENVIRONMENT
+from alcli.daemonclient import STANDARD_FDS
+from alcli.daemonclient import get_socket_path
+from alcli.daemonclient import read_line
+
+logger = logging.getLogger('alcli.daemon')
+
+
+class DaemonCommand(object):
+    """
+        alcli daemon [--socket <path>]
+
+        Keeps service definitions and authenticated sessions loaded and
+        runs commands received on a Unix socket from alcli-client:
+            alcli-client aims get_account_details --account_id 12345678
+
+        Every command runs in a process forked from the daemon, with the
+        client's working directory, ALERTLOGIC_* and ALCLI_* environment
+        variables and standard input, output and error, so it behaves
+        as if alcli was run by the client itself
+    """
+
+    name = 'daemon'
+
+    def __init__(self, cli, services):
+        self._cli = cli
+        self._services = services
+        self._running = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', dest='socket', default=None,
+                            help="Unix socket path, defaults to daemon.sock "
+                                 "in the alcli cache directory")
+
+    def __call__(self, args, parsed_globals):
+        if self._running:
+            sys.stderr.write("Already running alcli daemon\n")
+            return 255
+        self._running = True
+
+        socket_path = parsed_globals.socket or get_socket_path()
+        self.preload(parsed_globals)
+        server = ALCliDaemonServer(socket_path, self._cli)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        sys.stderr.write(f"alcli daemon listening on {socket_path}\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+
+    def preload(self, parsed_globals):
+        """
+            Load the client of every service with a session for the daemon's
+            global options, for commands to inherit
+        """
+        # Preloaded for commands to inherit, --query imports it
+        import jmespath  # noqa: F401
+        from almdrlib.session import AuthenticationException
+        sessions = self._cli.keep_sessions()
+        with timer.phase('preload'):
+            try:
+                for name, service in self._services.items():
+                    try:
+                        sessions.get_client(service, parsed_globals)
+                    except AuthenticationException:
+                        raise
+                    except Exception as e:
+                        logger.debug(f"Unable to preload '{name}': {e}")
+            except AuthenticationException as e:
+                sys.stderr.write(
+                    f"Unable to authenticate, services will be loaded on first use: {e}\n")
+
+
+class ALCliDaemonServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """ Unix socket server accessible to the owner only """
+
+    def __init__(self, socket_path, cli):
+        self.cli = cli
+        self.socket_path = socket_path
+        socket_dir = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        self._remove_stale_socket()
+
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, ALCliDaemonHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"alcli daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+
+class ALCliDaemonHandler(socketserver.BaseRequestHandler):
+    """
+        Runs a single command in a process forked from the daemon.
+        The request is a JSON line with the command line arguments, the
+        working directory and environment of the client, sent along with
+        the client's standard file descriptors. The response is a JSON line
+        with the exit status
+    """
+
+    def handle(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        self._done = False
+        try:
+            request = self.receive()
+        except (OSError, ValueError) as e:
+            logger.debug(f"Invalid request: {e}")
+            return
+
+        threading.Thread(target=self.watch, daemon=True).start()
+        status = self.execute(request)
+        self._done = True
+        self.request.sendall(json.dumps({'status': status}).encode() + b'\n')
+
+    def receive(self):
+        fds = array.array('i')
+        data, ancdata, flags, address = self.request.recvmsg(
+                4096, socket.CMSG_SPACE(len(STANDARD_FDS) * fds.itemsize))
+        for level, kind, fd_data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(fd_data[:len(fd_data) - len(fd_data) % fds.itemsize])
+        if len(fds) != len(STANDARD_FDS):
+            raise ValueError(f"expected {len(STANDARD_FDS)} file descriptors, got {len(fds)}")
+
+        for fd, standard_fd in zip(fds, STANDARD_FDS):
+            os.dup2(fd, standard_fd)
+            os.close(fd)
+
+        line = read_line(self.request, data)
+        if line is None:
+            raise ValueError("connection closed")
+        return json.loads(line)
+
+    def execute(self, request):
+        for name in list(os.environ):
+            if name.startswith(FORWARDED_ENVIRONMENT):
+                del os.environ[name]
+        os.environ.update(request['environment'])
+
+        status = 0
+        try:
+            os.chdir(request['cwd'])
+            timer.reset()
+            status = self.server.cli.main(request['args']) or 0
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except KeyboardInterrupt:
+            status = 130
+        except Exception:
+            traceback.print_exc()
+            status = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        return status
+
+    def watch(self):
+        # The client asks to interrupt the command, or is gone
+        try:
+            self.request.recv(64)
+        except OSError:
+            pass
+        if not self._done:
+            _thread.interrupt_main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Thin client for alcli daemon. Only standard library modules needed to
+# talk to the daemon are imported, so that a command costs little more
+# than starting the interpreter
+#
+import os
+import sys
+import json
+import array
+import socket
+
+DAEMON_SOCKET_FILE = 'daemon.sock'
+
+# Environment variables forwarded to the daemon with each command
+FORWARDED_ENVIRONMENT = ('ALERTLOGIC_', 'ALCLI_')
+
+# Standard input, output and error are passed to the daemon
+STANDARD_FDS = [0, 1, 2]
+
+
+def get_socket_path():
+    socket_path = os.environ.get('ALCLI_DAEMON_SOCKET')
+    if socket_path:
+        return socket_path
+    from alcli.specindex import get_cache_dir
+    return os.path.join(get_cache_dir(), DAEMON_SOCKET_FILE)
+
+
+def send_request(connection, request, fds):
+    """ Send a JSON request line along with file descriptors """
+    data = json.dumps(request).encode() + b'\n'
+    sent = connection.sendmsg(
+            [data],
+            [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    if sent < len(data):
+        connection.sendall(data[sent:])
+
+
+def read_line(connection, data=b''):
+    """ Read from connection up to a newline, None if it's closed first """
+    while b'\n' not in data:
+        chunk = connection.recv(4096)
+        if not chunk:
+            return None
+        data += chunk
+    return data.split(b'\n', 1)[0]
+
+
+def run(args, socket_path=None):
+    """
+        Run alcli command line args in the daemon. Its output goes straight
+        to this process' stdout and stderr. Returns the exit status, or
+        None if the daemon isn't running
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path or get_socket_path())
+    except OSError:
+        connection.close()
+        return None
+
+    with connection:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send_request(connection, {
+            'args': args,
+            'cwd': os.getcwd(),
+            'environment': {
+                name: value for name, value in os.environ.items()
+                if name.startswith(FORWARDED_ENVIRONMENT)
+            }
+        }, STANDARD_FDS)
+
+        try:
+            response = read_line(connection)
+        except KeyboardInterrupt:
+            # Let the daemon interrupt the command, and wait for it to stop
+            connection.sendall(b'interrupt\n')
+            response = read_line(connection)
+
+    if response is None:
+        sys.stderr.write("alcli daemon closed the connection\n")
+        return 255
+    return json.loads(response)['status']
+
+
+def main():
+    status = run(sys.argv[1:])
+    if status is None:
+        # No daemon, run the command in this process
+        from alcli.alertlogic_cli import main as alcli_main
+        alcli_main()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
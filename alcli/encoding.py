@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Encoding of command line parameter values into operation arguments
+#
+import os
+import re
+import logging
+import textwrap
+from json import JSONDecodeError
+from urllib.parse import urlparse
+
+from alcli.jsoncodec import json_codec
+from alcli.fileinput import open_binary_file
+from alcli.fileinput import requires_bytes
+
+logger = logging.getLogger('alcli.encoding')
+
+# Short form of objects, such as key1=value,key2=value2
+SHORTHAND_REGEX = re.compile('(?P<pair>(?P<key>.+?)(?:=)(?P<value>[^=]+)(?:,|$))')
+
+
+def encode_verbatim(value):
+    return value
+
+
+def encode_array(value):
+    try:
+        return json_codec.loads(value)
+    except JSONDecodeError as e:
+        bad_input_lines = value.split('\n')
+        bad_input_lines.insert(e.lineno, ' ' * (e.colno - 1) + "^ ERROR")
+        explainer = '\n'.join(bad_input_lines)
+        explainer = textwrap.indent(explainer, '    ')
+        logger.error(f"Unable to parse input as JSON.  "
+                     f"Line {e.lineno}, column {e.colno}: {e.msg}\n"
+                     f"Input:\n{explainer}\nFalling back to using the input as a string.")
+        return value
+
+
+def encode_object(value):
+    try:
+        return json_codec.loads(value)
+    except JSONDecodeError:
+        result = dict(
+            (m.groupdict()['key'], m.groupdict()['value'])
+            for m in SHORTHAND_REGEX.finditer(value)
+        )
+        return result or value
+
+
+def resolve_type(parameter):
+    """ Type of a parameter, looked up in oneOf, anyOf or allOf schemas """
+    from almdrlib.client import OpenAPIKeyWord
+    parameter_type = parameter.get(OpenAPIKeyWord.TYPE)
+    oneof = parameter.get(OpenAPIKeyWord.ONE_OF)
+    anyof = parameter.get(OpenAPIKeyWord.ANY_OF)
+    allof = parameter.get(OpenAPIKeyWord.ALL_OF)
+
+    if oneof or anyof or allof:
+        # Attempt to find type in the decomposed schema
+        find_type = [t.get('type') for t in allof or anyof or oneof if t.get('type')]
+        parameter_type = find_type[0] if find_type else None
+
+    # If failed to figure parameter_type out, fallback to object
+    return parameter_type or OpenAPIKeyWord.OBJECT
+
+
+def get_encoder(parameter_type):
+    from almdrlib.client import OpenAPIKeyWord
+    if parameter_type in OpenAPIKeyWord.SIMPLE_DATA_TYPES:
+        return encode_verbatim
+    if parameter_type == OpenAPIKeyWord.ARRAY:
+        # Array items are always given as JSON
+        return encode_array
+    if parameter_type in OpenAPIKeyWord.OBJECT:
+        return encode_object
+    return encode_verbatim
+
+
+class EncoderPlan(object):
+    """
+        Encoders of an operation's parameters, resolved from its schema
+        once and reused for every call of the operation
+    """
+
+    def __init__(self, operation):
+        from almdrlib.client import OpenAPIKeyWord
+        self._encoders = {}
+        self._copy_files = {}
+        parameters = operation.get_schema()[OpenAPIKeyWord.PARAMETERS]
+        for name, parameter in parameters.items():
+            self._encoders[name] = get_encoder(resolve_type(parameter))
+            # Path, query and header parameters, and those almdrlib
+            # encodes as text, can't be given a memory map
+            self._copy_files[name] = \
+                OpenAPIKeyWord.IN in parameter or requires_bytes(parameter)
+
+    def encode(self, name, value):
+        if not isinstance(value, str):
+            # Already decoded, e.g. parameters read from a batch file
+            return value
+
+        if ':' in value:
+            p = urlparse(value)
+            if p.scheme == "fileb":
+                # Raw bytes, streamed from a memory map where possible
+                return open_binary_file(
+                        os.path.abspath(os.path.join(p.netloc, p.path)),
+                        copy=self._copy_files[name])
+            if p.scheme == "file":
+                value_file_path = os.path.abspath(os.path.join(p.netloc, p.path))
+                with open(value_file_path, "r") as value_file:
+                    value = value_file.read()
+
+        return self._encoders[name](value)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import re
+
+from alcli.tokencache import create_session
+from alcli.concurrency import OperationRunner
+from alcli.responsecache import get_response_cache
+from alcli.concurrency import ORDER_COMPLETION
+from alcli.concurrency import execute
+from alcli.batch import write_result
+
+
+def parse_account_ids(value):
+    """
+        Parse --account_ids value: either a comma or whitespace separated
+        list of account ids, or @<file> with one account id per line.
+        Empty lines and lines starting with # are ignored
+    """
+    if value.startswith('@'):
+        with open(value[1:], 'r') as accounts_file:
+            lines = [line.split('#', 1)[0] for line in accounts_file]
+        value = ' '.join(lines)
+
+    account_ids = []
+    for account_id in re.split(r'[\s,]+', value):
+        if account_id and account_id not in account_ids:
+            account_ids.append(account_id)
+    return account_ids
+
+
+def fan_out(service, operation_name, kwargs, parsed_globals):
+    """
+        Run the same operation for every account listed in --account_ids
+        over one session. Results are tagged with the account id and
+        streamed as JSON lines, as they complete unless --order input is
+        given. A summary of failed accounts is written to stderr
+    """
+    try:
+        account_ids = parse_account_ids(parsed_globals.account_ids)
+    except OSError as e:
+        sys.stderr.write(f"Unable to read --account_ids file: {e}\n")
+        return 255
+    session, token_key = create_session(parsed_globals)
+    runner = OperationRunner(session, token_key,
+                             rate_limit=parsed_globals.rate_limit,
+                             query=parsed_globals.query,
+                             cache=get_response_cache(parsed_globals))
+
+    def run_for_account(account_id):
+        parameters = dict(kwargs, account_id=account_id)
+        return runner.run(service, operation_name, parameters,
+                          {'account_id': account_id})
+
+    failures = []
+    for result in execute(run_for_account, account_ids,
+                          concurrency=parsed_globals.concurrency,
+                          order=parsed_globals.results_order or ORDER_COMPLETION):
+        if result.get('error') is not None:
+            failures.append(result)
+        write_result(result)
+
+    if failures:
+        summary = [f"{len(failures)} of {len(account_ids)} accounts failed:"]
+        for result in failures:
+            summary.append(f"  {result['account_id']}: {result['error']}")
+        sys.stderr.write('\n'.join(summary) + '\n')
+        return 255
+    return 0
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Raw parameter values read from files given as fileb://<path>
+#
+import os
+import mmap
+
+
+def open_binary_file(file_path, copy=False):
+    """
+        Contents of a file as a read only memory map, which requests
+        streams from the page cache without a copy on the heap.
+        With copy, or for empty files that can't be mapped, as bytes
+    """
+    with open(file_path, 'rb') as binary_file:
+        if copy or os.fstat(binary_file.fileno()).st_size == 0:
+            return binary_file.read()
+        return mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def requires_bytes(parameter):
+    """
+        almdrlib encodes values of binary parameters that aren't bytes as
+        text, so these can't be given a memory map
+    """
+    schemas = [parameter] + list(parameter.get('content', {}).values())
+    return any(schema.get('format') == 'binary' for schema in schemas)
+
+
+def close_file_values(values):
+    """ Release memory maps opened for parameter values """
+    for value in values:
+        if isinstance(value, mmap.mmap):
+            value.close()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import logging
+import tempfile
+
+from alcli.timing import timer
+from alcli.clihelp import FormatHelp
+
+logger = logging.getLogger('alcli.helpcache')
+
+HELP_CACHE_DIR_PREFIX = 'help-'
+
+
+def render_help(help_generator):
+    return '\n'.join(list(help_generator.get_help())) + '\n'
+
+
+class ALCliHelpCache(object):
+    """
+        Rendered help pages of services and operations.
+
+        Pages are stored next to the spec index, so they're keyed by the
+        alsdkdefs and almdrlib versions and removed along with it, in a
+        directory for the alcli version and for whether pages are
+        rendered with terminal escape sequences or as plain text
+    """
+
+    def __init__(self, spec_index, alcli_version):
+        self._spec_index = spec_index
+        style = 'ansi' if FormatHelp.BOLD else 'plain'
+        self._version_prefix = f"{HELP_CACHE_DIR_PREFIX}{alcli_version}-"
+        self._dir_name = f"{self._version_prefix}{style}"
+        self._help_dir = os.path.join(spec_index.index_dir, self._dir_name)
+
+    def get_service_help(self, service_name):
+        file_name = f"{service_name}.txt"
+        text = self._load(file_name)
+        if text is None:
+            text = self._store(file_name,
+                               self._render_service(service_name,
+                                                    self._get_service_api(service_name)))
+        return text
+
+    def get_operation_help(self, service_name, operation_name):
+        file_name = f"{service_name}.{operation_name}.txt"
+        text = self._load(file_name)
+        if text is None:
+            service_api = self._get_service_api(service_name)
+            text = self._store(file_name, self._render_operation(
+                    service_api['operations'].get(operation_name, {})))
+        return text
+
+    def prebuild(self):
+        """ Render the help pages of every service and operation """
+        self._prune()
+        result = {'directory': self._help_dir, 'services': 0, 'operations': 0, 'failed': []}
+        for service_name in self._spec_index.list_services():
+            try:
+                service_api = self._get_service_api(service_name)
+                self._store(f"{service_name}.txt",
+                            self._render_service(service_name, service_api))
+                result['services'] += 1
+            except Exception as e:
+                logger.debug(f"Unable to render help of '{service_name}': {e}")
+                result['failed'].append(service_name)
+                continue
+
+            for operation_name, spec in service_api['operations'].items():
+                try:
+                    self._store(f"{service_name}.{operation_name}.txt",
+                                self._render_operation(spec))
+                    result['operations'] += 1
+                except Exception as e:
+                    logger.debug(f"Unable to render help of "
+                                 f"'{service_name} {operation_name}': {e}")
+                    result['failed'].append(f"{service_name} {operation_name}")
+        return result
+
+    def _get_service_api(self, service_name):
+        from almdrlib.session import Session
+        with timer.phase('load_service_api'):
+            return Session.get_service_api(service_name=service_name)
+
+    def _render_service(self, service_name, service_api):
+        from alcli.clihelp import ALCliServiceHelpFormatter
+        return render_help(ALCliServiceHelpFormatter(service_name, service_api))
+
+    def _render_operation(self, spec):
+        from alcli.clihelp import ALCliOperationHelpFormatter
+        return render_help(ALCliOperationHelpFormatter(spec))
+
+    def _load(self, file_name):
+        path = os.path.join(self._help_dir, file_name)
+        try:
+            with open(path, 'r') as help_file:
+                text = help_file.read()
+        except FileNotFoundError:
+            timer.increment('help_cache_miss')
+            return None
+        except OSError as e:
+            logger.debug(f"Ignoring unreadable help page '{path}': {e}")
+            timer.increment('help_cache_miss')
+            return None
+        timer.increment('help_cache_hit')
+        return text
+
+    def _store(self, file_name, text):
+        try:
+            os.makedirs(self._help_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._help_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as help_file:
+                help_file.write(text)
+            os.replace(tmp_path, os.path.join(self._help_dir, file_name))
+        except OSError as e:
+            logger.debug(f"Unable to write help page '{file_name}': {e}")
+        return text
+
+    def _prune(self):
+        """ Remove help pages rendered by other alcli versions """
+        try:
+            entries = os.listdir(self._spec_index.index_dir)
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.startswith(HELP_CACHE_DIR_PREFIX) and \
+                    not entry.startswith(self._version_prefix):
+                shutil.rmtree(os.path.join(self._spec_index.index_dir, entry),
+                              ignore_errors=True)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Decoding of JSON response bodies, parameter values and batch lines, with
+# the standard library or with orjson when it's installed.
+# Output is always encoded with the standard library: orjson can't indent
+# by 4 spaces, writes non ASCII characters unescaped and formats floats
+# differently, so every output format stays byte for byte the same
+#
+import os
+import json
+import logging
+
+logger = logging.getLogger('alcli.jsoncodec')
+
+BACKEND_AUTO = 'auto'
+BACKEND_JSON = 'json'
+BACKEND_ORJSON = 'orjson'
+
+JSON_BACKENDS = [BACKEND_AUTO, BACKEND_JSON, BACKEND_ORJSON]
+
+# Smaller documents are decoded with the standard library by the auto
+# backend, importing orjson takes longer than it would save
+AUTO_MIN_SIZE = 64 * 1024
+
+UTF8_ENCODINGS = ['utf-8', 'utf8']
+
+# Maps digits to '0' and everything else to ' ', to find runs of digits.
+# orjson decodes integers beyond 64 bits as floats, documents with a run of
+# digits that long, in a string or not, are left to the standard library
+DIGITS_TABLE = bytes(ord('0') if chr(c) in '0123456789' else ord(' ') for c in range(256))
+LONG_INTEGER = b'0' * 19
+
+
+def json_backend_from_env():
+    return os.environ.get('ALCLI_JSON_BACKEND')
+
+
+class ALCliJSONCodec(object):
+    """
+        Decodes JSON with the backend selected by --json_backend:
+            auto    orjson for large documents if it's installed,
+                    the standard library otherwise
+            json    the standard library
+            orjson  orjson
+        Documents orjson rejects or would decode differently, such as
+        ones with NaN or integers beyond 64 bits, are decoded by the
+        standard library, which also raises the errors of invalid
+        documents, so results and errors are the same whichever backend
+        is used
+    """
+
+    def __init__(self):
+        self._backend = BACKEND_AUTO
+        self._orjson = None
+
+    @property
+    def backend(self):
+        return self._backend
+
+    def use(self, backend=None):
+        """
+            Select a backend, or the one set with ALCLI_JSON_BACKEND.
+            Raises ImportError if orjson is selected but not installed
+        """
+        backend = backend or json_backend_from_env() or BACKEND_AUTO
+        if backend not in JSON_BACKENDS:
+            raise ValueError(f"Unknown JSON backend '{backend}', "
+                             f"expected one of {', '.join(JSON_BACKENDS)}")
+        if backend == BACKEND_ORJSON:
+            import orjson
+            self._orjson = orjson
+        self._backend = backend
+
+    def loads(self, data):
+        """ Decode a JSON document given as str or bytes """
+        orjson = self._get_orjson(data)
+        if orjson is not None and not has_long_integers(data):
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+        return json.loads(data)
+
+    def loads_response(self, res):
+        """ Decoded body of a requests or cached response, same as res.json() """
+        encoding = getattr(res, 'encoding', None)
+        if encoding is not None and encoding.lower() not in UTF8_ENCODINGS:
+            return self.loads(res.text)
+        try:
+            return self.loads(res.content)
+        except UnicodeDecodeError:
+            # Not UTF-8 after all, decoded with the guessed encoding
+            return self.loads(res.text)
+
+    def _get_orjson(self, data):
+        if self._backend == BACKEND_JSON or \
+                (self._backend == BACKEND_AUTO and len(data) < AUTO_MIN_SIZE):
+            return None
+        if self._orjson is None:
+            try:
+                import orjson
+                self._orjson = orjson
+            except ImportError:
+                logger.debug("orjson isn't installed, decoding with json")
+                self._orjson = False
+        return self._orjson or None
+
+
+def has_long_integers(data):
+    """ Whether data has a run of digits as long as a 64 bits integer """
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return LONG_INTEGER in data.translate(DIGITS_TABLE)
+
+
+# Process wide codec, the backend is selected by --json_backend
+json_codec = ALCliJSONCodec()
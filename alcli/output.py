@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import csv
+import json
+import textwrap
+import itertools
+
+OUTPUT_JSON = 'json'
+OUTPUT_JSON_COMPACT = 'json-compact'
+OUTPUT_NDJSON = 'ndjson'
+OUTPUT_TABLE = 'table'
+OUTPUT_CSV = 'csv'
+OUTPUT_TSV = 'tsv'
+OUTPUT_FORMATS = [
+    OUTPUT_JSON, OUTPUT_JSON_COMPACT, OUTPUT_NDJSON,
+    OUTPUT_TABLE, OUTPUT_CSV, OUTPUT_TSV
+]
+
+COMPACT_SEPARATORS = (',', ':')
+
+# Number of leading records columns and their widths are inferred from
+COLUMN_SAMPLE_SIZE = 100
+
+# Column of records that aren't objects
+VALUE_COLUMN = 'value'
+
+MAX_COLUMN_WIDTH = 48
+COLUMN_SEPARATOR = '  '
+TRUNCATED = '...'
+
+# Escapes of tab separated values, as in the text format of PostgreSQL's COPY
+TSV_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+class JSONWriter(object):
+    """
+        Indented JSON with sorted keys, the default output format.
+        The document is encoded into a single string and written at once,
+        json.dump would write each of its many small chunks separately
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+
+    def write(self, result):
+        self._stream.write(json.dumps(result, sort_keys=True, indent=4))
+        self._stream.write('\n')
+
+    def write_items(self, items):
+        """
+            Stream items as a JSON array, formatted as write would format
+            the whole list, writing each item as soon as it's available
+        """
+        separator = '[\n'
+        for item in items:
+            self._stream.write(separator)
+            self._stream.write(textwrap.indent(
+                    json.dumps(item, sort_keys=True, indent=4), '    '))
+            self._stream.flush()
+            separator = ',\n'
+        self._stream.write('[]\n' if separator == '[\n' else '\n]\n')
+
+
+class CompactJSONWriter(JSONWriter):
+    """ JSON document on a single line, keys in response order """
+
+    def write(self, result):
+        # json.dump always encodes in Python, json.dumps with the C encoder
+        self._stream.write(json.dumps(result, separators=COMPACT_SEPARATORS))
+        self._stream.write('\n')
+
+    def write_items(self, items):
+        separator = '['
+        for item in items:
+            self._stream.write(separator)
+            self._stream.write(json.dumps(item, separators=COMPACT_SEPARATORS))
+            self._stream.flush()
+            separator = ','
+        self._stream.write('[]\n' if separator == '[' else ']\n')
+
+
+class NDJSONWriter(JSONWriter):
+    """
+        JSON lines: each element of a top level array on its own line,
+        flushed as it's written so consumers can start right away.
+        Any other document is written as a single line
+    """
+
+    def write(self, result):
+        self.write_items(result if isinstance(result, list) else [result])
+
+    def write_items(self, items):
+        for item in items:
+            self._stream.write(json.dumps(item, separators=COMPACT_SEPARATORS))
+            self._stream.write('\n')
+            self._stream.flush()
+
+
+def format_cell(value):
+    """ Text of a table cell, nested objects and arrays as compact JSON """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=COMPACT_SEPARATORS)
+    return str(value)
+
+
+class RecordWriter(object):
+    """
+        Rows of records, one per element of a top level array, or a single
+        one for any other document. Columns are the keys of the first
+        COLUMN_SAMPLE_SIZE records, in the order they're first seen;
+        keys that only appear later are left out. Rows are written as
+        records are read, so only the sample is held in memory
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream or sys.stdout
+
+    def write(self, result):
+        self._write_records(result if isinstance(result, list) else [result],
+                            flush=False)
+
+    def write_items(self, items):
+        self._write_records(items, flush=True)
+
+    def _write_records(self, records, flush):
+        records = iter(records)
+        sample = list(itertools.islice(records, COLUMN_SAMPLE_SIZE))
+        if not sample:
+            return
+        columns = self.get_columns(sample)
+        sample_rows = [self.make_row(columns, record) for record in sample]
+        self.begin(columns, sample_rows)
+        for row in itertools.chain(
+                sample_rows,
+                (self.make_row(columns, record) for record in records)):
+            self.write_row(row)
+            if flush:
+                self._stream.flush()
+
+    @staticmethod
+    def get_columns(sample):
+        columns = {}
+        for record in sample:
+            for key in (record if isinstance(record, dict) else [VALUE_COLUMN]):
+                columns.setdefault(key, None)
+        return list(columns)
+
+    @staticmethod
+    def make_row(columns, record):
+        if not isinstance(record, dict):
+            record = {VALUE_COLUMN: record}
+        return [format_cell(record.get(column)) for column in columns]
+
+    def begin(self, columns, sample_rows):
+        raise NotImplementedError()
+
+    def write_row(self, row):
+        raise NotImplementedError()
+
+
+class CSVWriter(RecordWriter):
+    """ Comma separated values with a header row """
+
+    delimiter = ','
+
+    def begin(self, columns, sample_rows):
+        self._writer = csv.writer(
+                self._stream, delimiter=self.delimiter, lineterminator='\n')
+        self._writer.writerow(columns)
+
+    def write_row(self, row):
+        self._writer.writerow(row)
+
+
+class TSVWriter(RecordWriter):
+    """
+        Tab separated values with a header row. Cells aren't quoted,
+        backslashes, tabs and line breaks in cells are escaped instead
+    """
+
+    def begin(self, columns, sample_rows):
+        self.write_row(columns)
+
+    def write_row(self, row):
+        self._stream.write('\t'.join(cell.translate(TSV_ESCAPES) for cell in row))
+        self._stream.write('\n')
+
+
+class TableWriter(RecordWriter):
+    """
+        Aligned columns under a header. Column widths fit the sampled
+        records, up to MAX_COLUMN_WIDTH, and longer cells are truncated
+    """
+
+    def begin(self, columns, sample_rows):
+        self._widths = [
+            min(MAX_COLUMN_WIDTH,
+                max(len(cell) for cell in [column] + [row[i] for row in sample_rows]))
+            for i, column in enumerate(columns)
+        ]
+        self.write_row(columns)
+        self.write_row(['-' * width for width in self._widths])
+
+    def write_row(self, row):
+        cells = []
+        for cell, width in zip(row, self._widths):
+            cell = ' '.join(cell.splitlines())
+            if len(cell) > width:
+                cell = cell[:max(width - len(TRUNCATED), 0)] + TRUNCATED
+            cells.append(cell.ljust(width))
+        self._stream.write(COLUMN_SEPARATOR.join(cells).rstrip() + '\n')
+
+
+WRITERS = {
+    OUTPUT_JSON: JSONWriter,
+    OUTPUT_JSON_COMPACT: CompactJSONWriter,
+    OUTPUT_NDJSON: NDJSONWriter,
+    OUTPUT_TABLE: TableWriter,
+    OUTPUT_CSV: CSVWriter,
+    OUTPUT_TSV: TSVWriter
+}
+
+
+def get_writer(output_format=None, stream=None):
+    return WRITERS[output_format or OUTPUT_JSON](stream)
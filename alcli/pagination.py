@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import logging
+
+logger = logging.getLogger('alcli.pagination')
+
+# Request parameters carrying a continuation token, with the response
+# fields the next token is looked up in
+TOKEN_PARAMETERS = {
+    'continuation': ['continuation'],
+    'continuation_id': ['continuation_id', 'continuation'],
+    'starting_token': ['next_token'],
+}
+OFFSET_PARAMETER = 'offset'
+LIMIT_PARAMETER = 'limit'
+TOTAL_COUNT_FIELDS = ['total_count', 'total']
+
+
+class Paginator(object):
+    """
+        Follows the pages of a list operation.
+
+        Operations are paged either with a continuation token, returned in
+        the response and passed back in the next request, or with offset
+        and limit parameters. The paging style is detected from the
+        operation's parameters.
+    """
+
+    def __init__(self, parameters, page_size=None, max_items=None):
+        self._token_parameter = next(
+                (name for name in TOKEN_PARAMETERS if name in parameters), None)
+        self._offset_parameter = \
+            OFFSET_PARAMETER if OFFSET_PARAMETER in parameters else None
+        self._limit_parameter = \
+            LIMIT_PARAMETER if LIMIT_PARAMETER in parameters else None
+        self._page_size = page_size
+        self._max_items = max_items
+
+    @property
+    def pageable(self):
+        return bool(self._token_parameter or self._offset_parameter)
+
+    def items(self, fetch, kwargs):
+        """
+            Yields items of all pages. fetch(kwargs) performs the request
+            and returns the decoded response body
+        """
+        kwargs = dict(kwargs)
+        if self._page_size and self._limit_parameter:
+            kwargs[self._limit_parameter] = self._page_size
+        elif self._page_size:
+            sys.stderr.write("Ignoring --page_size, the operation has no "
+                             f"'{LIMIT_PARAMETER}' parameter\n")
+        if not self.pageable:
+            logger.debug("Operation doesn't support paging, fetching a single page")
+
+        count = 0
+        while True:
+            body = fetch(kwargs)
+            items = self.get_items(body)
+            for item in items:
+                yield item
+                count += 1
+                if self._max_items and count >= self._max_items:
+                    return
+
+            if not self._next_page(kwargs, body, len(items)):
+                return
+
+    def _next_page(self, kwargs, body, items_count):
+        """ Updates kwargs to request the next page. False if there is none """
+        if self._token_parameter:
+            token = None
+            if isinstance(body, dict):
+                token = next((body[field]
+                              for field in TOKEN_PARAMETERS[self._token_parameter]
+                              if body.get(field)), None)
+            if not token or token == kwargs.get(self._token_parameter):
+                return False
+            kwargs[self._token_parameter] = token
+            return True
+
+        if self._offset_parameter:
+            limit = kwargs.get(self._limit_parameter) if self._limit_parameter else None
+            if items_count == 0 or (limit and items_count < limit):
+                return False
+            offset = int(kwargs.get(self._offset_parameter) or 0) + items_count
+            total = self.get_total_count(body)
+            if total is not None and offset >= total:
+                return False
+            kwargs[self._offset_parameter] = offset
+            return True
+
+        return False
+
+    def get_items(self, body):
+        """
+            Items of a page: the body itself if it's a list, otherwise
+            the first list found at the top level of the body
+        """
+        if isinstance(body, list):
+            return body
+        if isinstance(body, dict):
+            for value in body.values():
+                if isinstance(value, list):
+                    return value
+        return [body]
+
+    @staticmethod
+    def get_total_count(body):
+        if not isinstance(body, dict):
+            return None
+        for container in [body, body.get('summary'), body.get('meta')]:
+            if isinstance(container, dict):
+                for field in TOTAL_COUNT_FIELDS:
+                    if isinstance(container.get(field), int):
+                        return container[field]
+        return None
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+from contextlib import contextmanager
+
+# Number of allocation sites reported by --profile_mem
+TOP_ALLOCATIONS = 25
+
+# Number of frames kept for each traced memory allocation
+TRACEBACK_FRAMES = 10
+
+
+def parse_profile_args(args):
+    """
+        Extracts --profile_cpu and --profile_mem values from the command line.
+        Profiling has to start before the main parser is even built,
+        so these are picked out of argv ahead of regular parsing
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--profile_cpu', dest='profile_cpu', default=None)
+    parser.add_argument('--profile_mem', dest='profile_mem', default=None)
+    parsed_args, _ = parser.parse_known_args(args)
+    return parsed_args.profile_cpu, parsed_args.profile_mem
+
+
+@contextmanager
+def profiled(cpu_file=None, mem_file=None):
+    """
+        Runs the enclosed block under cProfile and/or tracemalloc.
+
+        cProfile statistics are written to cpu_file in pstats format
+        (see python -m pstats). The memory report, with peak usage and the
+        top allocation sites, is written to mem_file as text, and the raw
+        tracemalloc snapshot next to it as <mem_file>.snapshot
+    """
+    profiler = None
+    if cpu_file:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    if mem_file:
+        import tracemalloc
+        tracemalloc.start(TRACEBACK_FRAMES)
+
+    if profiler:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cpu_file)
+
+        if mem_file:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            _write_memory_report(mem_file, snapshot, current, peak)
+
+
+def _write_memory_report(mem_file, snapshot, current, peak):
+    import tracemalloc
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+    snapshot.dump(f"{mem_file}.snapshot")
+
+    lines = [
+        f"Current traced memory: {current / 1024:.1f} KiB",
+        f"Peak traced memory: {peak / 1024:.1f} KiB",
+        "",
+        f"Top {TOP_ALLOCATIONS} allocation sites:",
+    ]
+    for index, stat in enumerate(
+            snapshot.statistics('traceback')[:TOP_ALLOCATIONS], 1):
+        lines.append("")
+        lines.append(
+            f"#{index}: {stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format())
+
+    with open(mem_file, 'w') as report_file:
+        report_file.write('\n'.join(lines) + '\n')
+
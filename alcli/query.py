@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+
+from alcli.timing import timer
+
+# Number of compiled expressions kept per process
+QUERY_CACHE_SIZE = 128
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(expression):
+    """
+        Compiled JMESPath expression. Raises jmespath.exceptions.ParseError
+        for invalid expressions
+    """
+    import jmespath
+    with timer.phase('compile_query'):
+        return jmespath.compile(expression)
+
+
+def search(expression, data):
+    """ Apply --query expression to data, compiling it only once """
+    if not expression:
+        return data
+    return compile_query(expression).search(data)
+
+
+def validate_query(expression):
+    """
+        Returns an error message if expression isn't a valid
+        JMESPath expression, None otherwise
+    """
+    from jmespath.exceptions import ParseError
+    try:
+        compile_query(expression)
+    except ParseError as e:
+        return f"Invalid --query: {e}"
+    return None
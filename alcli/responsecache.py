@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+
+from alcli.specindex import get_cache_dir
+from alcli.timing import timer
+from alcli.jsoncodec import json_codec
+from alcli.output import get_writer
+
+logger = logging.getLogger('alcli.responsecache')
+
+RESPONSE_CACHE_DIR = 'responses'
+
+# Upper bound of the cache size in bytes, least recently used responses
+# are evicted beyond it. Overridden with ALCLI_RESPONSE_CACHE_SIZE
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+# Only responses to these methods are cached
+SAFE_METHODS = ['get', 'head']
+
+# Response headers kept along with the body
+CACHED_HEADERS = ['content-type', 'etag', 'last-modified', 'date']
+
+
+class CachedResponse(object):
+    """ Response restored from the cache, used in place of requests.Response """
+
+    def __init__(self, entry):
+        from requests.structures import CaseInsensitiveDict
+        self.status_code = entry['status']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self.text = entry['body']
+
+    @property
+    def content(self):
+        return self.text.encode()
+
+    def json(self):
+        return json_codec.loads(self.text)
+
+
+class ALCliResponseCache(object):
+    """
+        On disk cache of responses to read only operations.
+
+        Responses are keyed by service, operation, encoded parameters,
+        account, endpoint and access key id, one file per response.
+        Entries are reused while they are younger than the TTL requested
+        by the current invocation. Older entries with an ETag or
+        Last-Modified header are revalidated with a conditional request,
+        and reused if the server answers 304 Not Modified.
+        Reading an entry refreshes its modification time, and the least
+        recently used entries are evicted once the cache grows beyond
+        its maximum size
+    """
+
+    def __init__(self, ttl=None, cache_dir=None, max_size=None):
+        self._ttl = ttl
+        self._cache_dir = os.path.join(
+                cache_dir or get_cache_dir(), RESPONSE_CACHE_DIR)
+        self._max_size = max_size or \
+            int(os.environ.get('ALCLI_RESPONSE_CACHE_SIZE') or DEFAULT_MAX_SIZE)
+
+    @staticmethod
+    def cacheable(operation):
+        return operation.method.lower() in SAFE_METHODS
+
+    @staticmethod
+    def make_key(client, operation_name, op_args):
+        session = client._session
+        account_id = op_args.get('account_id') or session.account_id
+        key = json.dumps([
+                client.name, operation_name, op_args, account_id,
+                session.global_endpoint_url, session.residency,
+                session._access_key_id
+            ], sort_keys=True, default=str)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        """
+            Returns the cached response for key if it's fresh. Otherwise
+            returns None and the stale entry if it can be revalidated
+        """
+        path = self._path(key)
+        entry = self._load(path)
+        if entry is not None and time.time() - entry['created'] <= self._ttl:
+            timer.increment('response_cache_hit')
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return CachedResponse(entry), None
+
+        if entry is not None and self.validators(entry):
+            return None, entry
+        timer.increment('response_cache_miss')
+        return None, None
+
+    @staticmethod
+    def validators(entry):
+        """ Conditional request headers revalidating a stale entry """
+        headers = {}
+        if entry['headers'].get('etag'):
+            headers['If-None-Match'] = entry['headers']['etag']
+        if entry['headers'].get('last-modified'):
+            headers['If-Modified-Since'] = entry['headers']['last-modified']
+        return headers
+
+    def put(self, key, service_name, operation_name, response, stale=None):
+        """
+            Cache a successful response. A 304 response to the revalidation
+            of stale refreshes it instead. Returns the response to use
+        """
+        if stale is not None:
+            if response.status_code == 304:
+                logger.debug(f"{service_name} {operation_name} not modified")
+                timer.increment('response_cache_revalidated')
+                stale['created'] = time.time()
+                self._store(self._path(key), stale)
+                return CachedResponse(stale)
+            timer.increment('response_cache_miss')
+
+        if not 200 <= response.status_code < 300:
+            return response
+        self._store(self._path(key), {
+            'created': time.time(),
+            'service': service_name,
+            'operation': operation_name,
+            'status': response.status_code,
+            'headers': {
+                name: response.headers[name] for name in CACHED_HEADERS
+                if name in response.headers
+            },
+            'body': response.text
+        })
+        self._evict()
+        return response
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            'directory': self._cache_dir,
+            'entries': len(entries),
+            'size': sum(stat.st_size for _, stat in entries),
+            'max_size': self._max_size
+        }
+
+    def clear(self):
+        removed = 0
+        for path, _ in self._entries():
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError as e:
+                logger.debug(f"Unable to remove '{path}': {e}")
+        return removed
+
+    def _evict(self):
+        entries = self._entries()
+        size = sum(stat.st_size for _, stat in entries)
+        if size <= self._max_size:
+            return
+
+        for path, stat in sorted(entries, key=lambda entry: entry[1].st_mtime):
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            timer.increment('response_cache_evicted')
+            size -= stat.st_size
+            if size <= self._max_size:
+                return
+
+    def _entries(self):
+        """ Path and stat of every cached response """
+        entries = []
+        try:
+            with os.scandir(self._cache_dir) as directory:
+                for entry in directory:
+                    if entry.name.endswith('.json'):
+                        try:
+                            entries.append((entry.path, entry.stat()))
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return entries
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, f"{key}.json")
+
+    def _load(self, path):
+        try:
+            with open(path, 'r') as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable cached response '{path}': {e}")
+            return None
+
+    def _store(self, path, entry):
+        try:
+            os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(entry, cache_file, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Unable to write cached response: {e}")
+
+
+def get_response_cache(parsed_globals):
+    """ Response cache for --cache_ttl, None unless it's given """
+    if not parsed_globals.cache_ttl:
+        return None
+    return ALCliResponseCache(ttl=parsed_globals.cache_ttl)
+
+
+class CacheCommand(object):
+    """
+        alcli cache clear|stats
+
+        Removes or reports the responses cached with --cache_ttl
+    """
+
+    name = 'cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['clear', 'stats'])
+
+    def __call__(self, args, parsed_globals):
+        cache = ALCliResponseCache()
+        if parsed_globals.action == 'clear':
+            result = {'removed': cache.clear()}
+        else:
+            result = cache.stats()
+        get_writer(parsed_globals.output_format).write(result)
+        return 0
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import json
+import logging
+import tempfile
+
+from alcli.timing import timer
+from alcli.output import get_writer
+
+logger = logging.getLogger('alcli.searchindex')
+
+# Bump whenever the layout of the search index changes
+SEARCH_INDEX_VERSION = 1
+
+# Not a valid service name, so it can't collide with a service's spec index
+SEARCH_INDEX_FILE = '_search-index.json'
+
+DEFAULT_LIMIT = 20
+
+# Results scoring less are left out
+MIN_SCORE = 1.0
+
+# Weights of the components of a result's score
+EXACT_NAME_WEIGHT = 10.0
+NAME_TOKEN_WEIGHT = 3.0
+NAME_SIMILARITY_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Names at least this similar to an invalid choice are suggested
+SUGGESTION_SIMILARITY = 0.5
+MAX_SUGGESTIONS = 5
+
+MIN_DESCRIPTION_TOKEN_LENGTH = 3
+STOP_WORDS = frozenset([
+    'and', 'are', 'for', 'from', 'has', 'have', 'its', 'not', 'the',
+    'that', 'this', 'was', 'which', 'will', 'with'
+])
+
+TOKEN_REGEX = re.compile('[a-z0-9]+')
+
+
+def tokenize(text):
+    return TOKEN_REGEX.findall(text.lower())
+
+
+def trigrams(name):
+    padded = f"${name.lower()}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(name_trigrams, other_trigrams):
+    """ Dice coefficient of the trigrams of two names """
+    if not name_trigrams or not other_trigrams:
+        return 0.0
+    shared = len(name_trigrams & other_trigrams)
+    return 2.0 * shared / (len(name_trigrams) + len(other_trigrams))
+
+
+class ALCliSearchIndex(object):
+    """
+        Inverted index of the names and descriptions of every service,
+        operation and operation parameter, built from the spec index:
+        {
+            'documents': [[service, operation, parameter], ...],
+            'names': {name or name token: [document, ...]},
+            'trigrams': {name trigram: [document, ...]},
+            'descriptions': {description token: [document, ...]}
+        }
+        Operation and parameter are None for services and operations.
+        The index is stored in the spec index directory, so it's rebuilt
+        whenever almdrlib or alsdkdefs is upgraded
+    """
+
+    def __init__(self, spec_index):
+        self._spec_index = spec_index
+        self._index = None
+
+    @property
+    def path(self):
+        return os.path.join(self._spec_index.index_dir, SEARCH_INDEX_FILE)
+
+    def exists(self):
+        """ Whether an index of the current version was built, loading it """
+        if self._index is None:
+            self._index = self._load()
+        return self._index is not None
+
+    def search(self, term, limit=DEFAULT_LIMIT):
+        """ Services, operations and parameters best matching term """
+        index = self._get_index()
+        documents = index['documents']
+        term_tokens = tokenize(term)
+        if not term_tokens:
+            return []
+        term_name = '_'.join(term_tokens)
+        term_trigrams = trigrams(term_name)
+
+        with timer.phase('search'):
+            candidates = set(index['names'].get(term_name, []))
+            for token in term_tokens:
+                candidates.update(index['names'].get(token, []))
+                candidates.update(index['descriptions'].get(token, []))
+            for trigram in term_trigrams:
+                candidates.update(index['trigrams'].get(trigram, []))
+
+            description_matches = {}
+            for token in set(term_tokens):
+                for document in set(index['descriptions'].get(token, [])):
+                    description_matches[document] = \
+                        description_matches.get(document, 0) + 1
+
+            results = []
+            for document in candidates:
+                name = self._name(documents[document])
+                name_tokens = set(tokenize(name))
+                score = \
+                    EXACT_NAME_WEIGHT * (name.lower() == term_name) + \
+                    NAME_TOKEN_WEIGHT * \
+                    sum(t in name_tokens for t in term_tokens) / len(term_tokens) + \
+                    NAME_SIMILARITY_WEIGHT * similarity(term_trigrams, trigrams(name)) + \
+                    DESCRIPTION_WEIGHT * \
+                    description_matches.get(document, 0) / len(set(term_tokens))
+                if score >= MIN_SCORE:
+                    results.append((score, document))
+
+            results.sort(key=lambda result: (
+                -result[0], [name or '' for name in documents[result[1]]]))
+            return [self._make_result(documents[document], score)
+                    for score, document in results[:limit]]
+
+    def suggest(self, value, choices):
+        """
+            Choices similar to an invalid value, and operations of any
+            service named like it, as '<service> <operation>'
+        """
+        index = self._get_index()
+        documents = index['documents']
+        value_trigrams = trigrams(value)
+        choices = set(choices)
+
+        candidates = set()
+        for trigram in value_trigrams:
+            candidates.update(index['trigrams'].get(trigram, []))
+
+        close_choices = {}
+        operations = {}
+        for document in candidates:
+            service, operation, parameter = documents[document]
+            if parameter is not None:
+                continue
+            name = self._name(documents[document])
+            score = similarity(value_trigrams, trigrams(name))
+            if score < SUGGESTION_SIMILARITY:
+                continue
+            if name in choices:
+                close_choices[name] = max(score, close_choices.get(name, 0))
+            elif operation is not None:
+                operations[f"{service} {operation}"] = score
+
+        ranked = sorted(close_choices.items(), key=lambda item: (-item[1], item[0]))
+        ranked += sorted(operations.items(), key=lambda item: (-item[1], item[0]))
+        return [name for name, _ in ranked[:MAX_SUGGESTIONS]]
+
+    def build(self):
+        with timer.phase('build_search_index'):
+            index = self._build()
+        self._store(index)
+        self._index = index
+        return index
+
+    def _get_index(self):
+        if self._index is None:
+            with timer.phase('load_search_index'):
+                self._index = self._load()
+            if self._index is None:
+                self.build()
+        return self._index
+
+    @staticmethod
+    def _name(document):
+        service, operation, parameter = document
+        return parameter or operation or service
+
+    @staticmethod
+    def _make_result(document, score):
+        service, operation, parameter = document
+        result = {'service': service, 'score': round(score, 3)}
+        if operation is not None:
+            result['operation'] = operation
+        if parameter is not None:
+            result['parameter'] = parameter
+        return result
+
+    def _build(self):
+        index = {
+            'version': SEARCH_INDEX_VERSION,
+            'documents': [],
+            'names': {},
+            'trigrams': {},
+            'descriptions': {}
+        }
+
+        def add_document(document, description):
+            number = len(index['documents'])
+            index['documents'].append(document)
+            name = self._name(document)
+            for token in set([name.lower()] + tokenize(name)):
+                index['names'].setdefault(token, []).append(number)
+            for trigram in trigrams(name):
+                index['trigrams'].setdefault(trigram, []).append(number)
+            for token in set(tokenize(description or '')):
+                if len(token) >= MIN_DESCRIPTION_TOKEN_LENGTH and \
+                        token not in STOP_WORDS:
+                    index['descriptions'].setdefault(token, []).append(number)
+
+        for service_name in self._spec_index.list_services():
+            service_index = self._spec_index.get_service(service_name)
+            add_document([service_name, None, None], service_index['description'])
+            for op_name, op_index in service_index['operations'].items():
+                add_document([service_name, op_name, None], op_index['description'])
+                for name, descriptor in op_index['parameters'].items():
+                    add_document([service_name, op_name, name],
+                                 descriptor.get('description'))
+        return index
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as index_file:
+                index = json.load(index_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable search index '{self.path}': {e}")
+            return None
+        if not isinstance(index, dict) or index.get('version') != SEARCH_INDEX_VERSION:
+            return None
+        return index
+
+    def _store(self, index):
+        index_dir = self._spec_index.index_dir
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as index_file:
+                json.dump(index, index_file, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Unable to write search index: {e}")
+
+
+class FindCommand(object):
+    """
+        alcli find <term> [<term> ...] [--limit <count>]
+
+        Finds services, operations and parameters across all services
+        by name or description, best matches first:
+            alcli find deployment_id
+    """
+
+    name = 'find'
+
+    def __init__(self, search_index):
+        self._search_index = search_index
+
+    def add_arguments(self, parser):
+        parser.add_argument('term', nargs='+')
+        parser.add_argument('--limit', dest='limit', default=DEFAULT_LIMIT, type=int,
+                            help="Maximum number of results")
+
+    def __call__(self, args, parsed_globals):
+        results = self._search_index.search(
+                ' '.join(parsed_globals.term), limit=parsed_globals.limit)
+        get_writer(parsed_globals.output_format).write(results)
+        return 0
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import shlex
+import logging
+
+from alcli.specindex import get_cache_dir
+
+logger = logging.getLogger('alcli.shell')
+
+PROMPT = 'alcli> '
+HISTORY_FILE = 'shell_history'
+HISTORY_LENGTH = 1000
+EXIT_COMMANDS = ['exit', 'quit']
+BOOLEAN_VALUES = ['true', 'false']
+
+
+class ShellCommand(object):
+    """
+        alcli shell
+
+        Interactive shell running alcli command lines, without the leading
+        alcli, in a single process:
+            alcli> aims get_account_details --account_id 12345678
+            alcli> --query 'users[].email' aims list_users --account_id 12345678
+
+        Global options given to alcli shell apply to every command, unless
+        a command overrides them. Loaded service definitions, sessions and
+        their authentication tokens are kept between commands
+    """
+
+    name = 'shell'
+
+    def __init__(self, cli):
+        self._cli = cli
+        self._running = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history_file', dest='history_file', default=None,
+                            help="Command history file")
+
+    def __call__(self, args, parsed_globals):
+        if self._running:
+            sys.stderr.write("Already running alcli shell\n")
+            return 255
+        self._running = True
+        try:
+            shell = ALCliShell(self._cli, parsed_globals,
+                               history_file=parsed_globals.history_file)
+            return shell.run()
+        finally:
+            self._running = False
+
+
+class ALCliShell(object):
+    """
+        Read-eval-print loop over an AlertLogicCLI instance, with readline
+        history and tab completion of services, operations and parameters
+    """
+
+    def __init__(self, cli, parsed_globals, history_file=None):
+        self._cli = cli
+        self._globals = parsed_globals
+        self._history_file = history_file or \
+            os.path.join(get_cache_dir(), HISTORY_FILE)
+        self._parser = None
+        self._matches = []
+
+    def run(self):
+        self._cli.keep_sessions()
+        interactive = sys.stdin.isatty()
+        readline = self._init_readline() if interactive else None
+        status = 0
+        try:
+            while True:
+                try:
+                    line = input(PROMPT if interactive else '')
+                except EOFError:
+                    if interactive:
+                        sys.stdout.write('\n')
+                    return status
+                except KeyboardInterrupt:
+                    sys.stdout.write('\n')
+                    continue
+
+                try:
+                    args = shlex.split(line)
+                except ValueError as e:
+                    sys.stderr.write(f"{e}\n")
+                    continue
+                if not args:
+                    continue
+                if args[0] in EXIT_COMMANDS:
+                    return status
+                status = self.execute(args)
+        finally:
+            if readline is not None:
+                self._save_history(readline)
+
+    def execute(self, args):
+        try:
+            return self._cli.run_command(args, self._globals) or 0
+        except SystemExit as e:
+            # argparse reports usage errors and --version by exiting
+            return e.code
+        except KeyboardInterrupt:
+            sys.stdout.write('\n')
+            return 130
+        finally:
+            sys.stdout.flush()
+
+    def complete(self, text, state):
+        """ readline completer """
+        if state == 0:
+            import readline
+            line = readline.get_line_buffer()[:readline.get_begidx()]
+            try:
+                candidates = self.get_candidates(shlex.split(line))
+            except ValueError:
+                candidates = []
+            self._matches = [c for c in candidates if c.startswith(text)]
+        return self._matches[state] if state < len(self._matches) else None
+
+    def get_candidates(self, words):
+        """ Possible next words of a command line starting with words """
+        spec_index = self._cli.spec_index
+        parser = self.get_parser()
+        options = parser._option_string_actions
+
+        position = 0
+        while position < len(words) and words[position].startswith('-'):
+            action = options.get(words[position])
+            if action is not None and action.nargs != 0:
+                if position + 1 == len(words):
+                    return list(action.choices or [])
+                position += 1
+            position += 1
+
+        if position == len(words):
+            return sorted(
+                    [o for o in options if o.startswith('--')] +
+                    spec_index.list_services() +
+                    self._cli.list_commands() +
+                    ['help'] + EXIT_COMMANDS)
+
+        service_name = words[position]
+        if service_name not in spec_index.list_services():
+            return []
+        operations = spec_index.get_operations(service_name)
+        operation_words = words[position + 1:]
+        if not operation_words:
+            return sorted(list(operations) + ['help'])
+
+        operation = operations.get(operation_words[0])
+        if operation is None:
+            return []
+        parameters = operation['parameters']
+        last = operation_words[-1]
+        if len(operation_words) > 1 and last.startswith('--'):
+            descriptor = parameters.get(last[2:])
+            if descriptor is not None:
+                if descriptor.get('enum'):
+                    return [str(value) for value in descriptor['enum']]
+                if descriptor['type'] == 'boolean':
+                    return BOOLEAN_VALUES
+                return []
+
+        given = {word[2:] for word in operation_words if word.startswith('--')}
+        return sorted(f"--{name}" for name in parameters if name not in given)
+
+    def get_parser(self):
+        if self._parser is None:
+            self._parser = self._cli.create_parser()
+        return self._parser
+
+    def _init_readline(self):
+        try:
+            import readline
+        except ImportError:
+            return None
+
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(' \t\n')
+        if 'libedit' in (readline.__doc__ or ''):
+            readline.parse_and_bind('bind ^I rl_complete')
+        else:
+            readline.parse_and_bind('tab: complete')
+        readline.set_history_length(HISTORY_LENGTH)
+        try:
+            readline.read_history_file(self._history_file)
+        except OSError:
+            pass
+        return readline
+
+    def _save_history(self, readline):
+        try:
+            os.makedirs(os.path.dirname(self._history_file), exist_ok=True)
+            readline.write_history_file(self._history_file)
+        except OSError as e:
+            logger.debug(f"Unable to write shell history: {e}")
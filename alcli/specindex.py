@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import shutil
+import logging
+import tempfile
+
+from alcli.timing import timer
+
+logger = logging.getLogger('alcli.specindex')
+
+# Bump whenever the layout of the cached documents changes
+INDEX_FORMAT_VERSION = 2
+
+SERVICES_INDEX_FILE = 'services.json'
+
+
+def get_cache_dir():
+    """
+        Root directory for alcli caches.
+        Defaults to ~/.alertlogic/cache/alcli, or ALCLI_CACHE_DIR if set
+    """
+    cache_dir = os.environ.get('ALCLI_CACHE_DIR')
+    if cache_dir:
+        return cache_dir
+
+    config_file = os.environ.get('ALERTLOGIC_CONFIG')
+    if config_file:
+        config_dir = os.path.dirname(os.path.abspath(config_file))
+    else:
+        config_dir = os.path.join(os.path.expanduser("~"), ".alertlogic")
+    return os.path.join(config_dir, "cache", "alcli")
+
+
+def make_parameter_descriptor(schema):
+    """
+        Reduce a parameter schema to what's needed to build
+        the argument parser for it
+    """
+    from almdrlib.client import OpenAPIKeyWord
+    from alcli.cliparser import ALCliParserUtils
+
+    param_type = schema.get(OpenAPIKeyWord.TYPE)
+    descriptor = {
+        'type': param_type,
+        'required': schema.get(OpenAPIKeyWord.REQUIRED, False),
+        'default': schema.get(OpenAPIKeyWord.DEFAULT, None)
+    }
+    if param_type == OpenAPIKeyWord.ARRAY:
+        descriptor['items_type'] = \
+            ALCliParserUtils.detect_array_items_type(schema.get('items', {}))
+    if 'enum' in schema:
+        descriptor['enum'] = schema['enum']
+    if schema.get(OpenAPIKeyWord.DESCRIPTION):
+        descriptor['description'] = schema[OpenAPIKeyWord.DESCRIPTION]
+    return descriptor
+
+
+class ALCliSpecIndex(object):
+    """
+        Precompiled, on-disk index of the services, operations and
+        operation parameters known to the installed alsdkdefs.
+
+        Each service is indexed the first time it's needed and the result
+        is stored in a directory keyed by alsdkdefs and almdrlib versions,
+        so upgrading either package transparently rebuilds the index.
+    """
+
+    def __init__(self, alsdkdefs_version, almdrlib_version, cache_dir=None):
+        self._key = \
+            f"index-v{INDEX_FORMAT_VERSION}" \
+            f"-alsdkdefs-{alsdkdefs_version}" \
+            f"-almdrlib-{almdrlib_version}"
+        self._cache_dir = cache_dir or get_cache_dir()
+        self._index_dir = os.path.join(self._cache_dir, self._key)
+        self._globals = None
+        self._service_indexes = {}
+
+    @property
+    def index_dir(self):
+        return self._index_dir
+
+    def list_services(self):
+        return self._get_globals()['services']
+
+    def list_global_endpoints(self):
+        return self._get_globals()['global_endpoints']
+
+    def list_residencies(self):
+        return self._get_globals()['residencies']
+
+    def _get_globals(self):
+        if self._globals is None:
+            self._globals = self._load(SERVICES_INDEX_FILE)
+            if self._globals is None:
+                with timer.phase('build_index'):
+                    self._globals = self._build_globals()
+                self._prune()
+                self._store(SERVICES_INDEX_FILE, self._globals)
+        return self._globals
+
+    def get_service(self, service_name):
+        """
+            Returns service index:
+            {
+                'description': ...,
+                'operations': {
+                    operation_name: {
+                        'description': ...,
+                        'parameters': {name: descriptor}
+                    }
+                }
+            }
+        """
+        service_index = self._service_indexes.get(service_name)
+        if service_index is None:
+            file_name = f"{service_name}.json"
+            service_index = self._load(file_name)
+            if service_index is None:
+                with timer.phase(f"build_index:{service_name}"):
+                    service_index = self._build_service(service_name)
+                self._store(file_name, service_index)
+            self._service_indexes[service_name] = service_index
+        return service_index
+
+    def get_operations(self, service_name):
+        return self.get_service(service_name)['operations']
+
+    def _build_globals(self):
+        from almdrlib.session import Session
+        from almdrlib.region import Region
+        from almdrlib.region import Residency
+        logger.debug("Building services index")
+        return {
+            'services': list(Session.list_services()),
+            'global_endpoints': list(Region.list_endpoints()),
+            'residencies': list(Residency.list_residencies())
+        }
+
+    def _build_service(self, service_name):
+        from almdrlib.session import Session
+        logger.debug(f"Building '{service_name}' service index")
+        service_api = Session.get_service_api(service_name)
+        return {
+            'description': service_api['info'].get('description', ''),
+            'operations': {
+                op_name: {
+                    'description': op_spec.get('description', ''),
+                    'parameters': {
+                        name: make_parameter_descriptor(schema)
+                        for name, schema in op_spec['parameters'].items()
+                    }
+                }
+                for op_name, op_spec in service_api['operations'].items()
+            }
+        }
+
+    def _load(self, file_name):
+        path = os.path.join(self._index_dir, file_name)
+        try:
+            with open(path, 'r') as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable index file '{path}': {e}")
+            return None
+
+    def _store(self, file_name, data):
+        try:
+            os.makedirs(self._index_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._index_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as index_file:
+                json.dump(data, index_file, separators=(',', ':'))
+            os.replace(tmp_path, os.path.join(self._index_dir, file_name))
+        except OSError as e:
+            logger.debug(f"Unable to write index file '{file_name}': {e}")
+
+    def _prune(self):
+        """ Remove indexes built for other package versions """
+        try:
+            entries = os.listdir(self._cache_dir)
+        except OSError:
+            return
+
+        for entry in entries:
+            if entry.startswith('index-') and entry != self._key:
+                shutil.rmtree(os.path.join(self._cache_dir, entry),
+                              ignore_errors=True)
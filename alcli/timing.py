@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class ALCliTimer(object):
+    """
+        Collects monotonic timestamps for the phases of a single alcli
+        invocation, plus named counters, and reports them either as a
+        human readable breakdown on stderr or as a JSON document.
+
+        Phases may nest (e.g. loading a service index while parsing
+        arguments) and may be recorded from several threads.
+    """
+
+    def __init__(self):
+        self._start = time.monotonic()
+        self._phases = []
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """ Start over, e.g. for a command run by a long lived process """
+        with self._lock:
+            self._start = time.monotonic()
+            self._phases = []
+            self._counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._phases.append((name, start, end))
+
+    def mark(self, name):
+        """ Record a phase that started when the timer was created """
+        with self._lock:
+            self._phases.append((name, self._start, time.monotonic()))
+
+    def increment(self, counter, value=1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    def report(self):
+        with self._lock:
+            phases = list(self._phases)
+            counters = dict(self._counters)
+
+        return {
+            'total_ms': self._ms(time.monotonic() - self._start),
+            'phases': [
+                {
+                    'name': name,
+                    'start_ms': self._ms(start - self._start),
+                    'duration_ms': self._ms(end - start)
+                }
+                for name, start, end in sorted(phases, key=lambda p: p[1])
+            ],
+            'counters': counters
+        }
+
+    def write(self, stderr=False, file_path=None):
+        report = self.report()
+        if file_path:
+            with open(file_path, 'w') as report_file:
+                json.dump(report, report_file, indent=4)
+        if stderr:
+            lines = ['Timing (ms):']
+            for phase in report['phases']:
+                lines.append(
+                    f"  {phase['name']:<28}"
+                    f"{phase['start_ms']:>10.3f} +{phase['duration_ms']:.3f}")
+            lines.append(f"  {'total':<28}{report['total_ms']:>10.3f}")
+            for name, value in sorted(report['counters'].items()):
+                lines.append(f"  {name:<28}{value:>10}")
+            sys.stderr.write('\n'.join(lines) + '\n')
+
+    @staticmethod
+    def _ms(seconds):
+        return round(seconds * 1000, 3)
+
+
+def timing_from_env():
+    """
+        Returns (stderr, file_path) as requested by ALCLI_TIMING
+        and ALCLI_TIMING_FILE environment variables
+    """
+    return bool(os.environ.get('ALCLI_TIMING')), \
+        os.environ.get('ALCLI_TIMING_FILE')
+
+
+# Process wide timer. Created on import, so the 'startup' phase covers
+# loading alcli modules
+timer = ALCliTimer()
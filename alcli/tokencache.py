@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+
+from alcli.specindex import get_cache_dir
+from alcli.timing import timer
+from alcli.transport import configure_transport
+from alcli.transport import get_transport_options
+
+logger = logging.getLogger('alcli.tokencache')
+
+TOKEN_CACHE_FILE = 'tokens.json'
+
+# Tokens expiring sooner than this are refreshed instead of reused
+EXPIRATION_MARGIN = 60
+
+
+class ALCliTokenCache(object):
+    """
+        Cross invocation cache of AIMS authentication tokens.
+
+        Tokens are keyed by profile, access key id, global endpoint and
+        residency and stored in a file readable by the owner only.
+        almdrlib.session.Session doesn't expose the token expiration,
+        so on a miss the cache authenticates on the session's behalf and
+        hands the resulting token to the session.
+    """
+
+    def __init__(self, cache_dir=None):
+        self._cache_dir = cache_dir or get_cache_dir()
+        self._cache_file = os.path.join(self._cache_dir, TOKEN_CACHE_FILE)
+
+    @staticmethod
+    def enabled():
+        return not os.environ.get('ALCLI_NO_TOKEN_CACHE')
+
+    def authenticate(self, session):
+        """
+            Provides session with a cached token, or authenticates it and
+            caches the token. Returns the cache key used for the session
+        """
+        access_key_id, secret_key = session._access_key_id, session._secret_key
+        if not access_key_id or not secret_key or access_key_id == "skip":
+            return None
+
+        key = self.make_key(
+                session._config.profile, access_key_id,
+                session.global_endpoint, session.residency)
+        entries = self._load()
+        entry = entries.get(key)
+        if entry and entry['expiration'] - EXPIRATION_MARGIN > time.time():
+            timer.increment('token_cache_hit')
+        else:
+            timer.increment('token_cache_miss')
+            with timer.phase('authenticate'):
+                entry = self._authenticate(session, access_key_id, secret_key)
+            if entry is None:
+                return None
+            entries = {k: v for k, v in entries.items()
+                       if v['expiration'] > time.time()}
+            entries[key] = entry
+            self._store(entries)
+
+        session._token = entry['token']
+        if session._account_id is None:
+            session._account_id = entry['account_id']
+        return key
+
+    def invalidate(self, key):
+        entries = self._load()
+        if entries.pop(key, None) is not None:
+            self._store(entries)
+
+    @staticmethod
+    def make_key(profile, access_key_id, global_endpoint, residency):
+        return hashlib.sha256(
+            f"{profile}|{access_key_id}|{global_endpoint}|{residency}".encode()
+        ).hexdigest()
+
+    def _authenticate(self, session, access_key_id, secret_key):
+        import requests
+        from almdrlib.session import AuthenticationException
+        try:
+            response = session._session.post(
+                    f"{session.global_endpoint_url}/aims/v1/authenticate",
+                    auth=(access_key_id, secret_key))
+            response.raise_for_status()
+            authentication = response.json()['authentication']
+            token = authentication['token']
+            account_id = authentication['account']['id']
+        except requests.exceptions.HTTPError as e:
+            raise AuthenticationException(f"invalid http response {e}")
+        except (KeyError, TypeError, ValueError):
+            raise AuthenticationException("token not found in response")
+
+        expiration = authentication.get('token_expiration')
+        if not expiration:
+            # Use the token for this invocation only
+            session._token = token
+            if session._account_id is None:
+                session._account_id = account_id
+            return None
+
+        return {
+            'token': token,
+            'account_id': account_id,
+            'expiration': expiration
+        }
+
+    def _load(self):
+        try:
+            with open(self._cache_file, 'r') as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug(f"Ignoring unreadable token cache: {e}")
+            return {}
+
+    def _store(self, entries):
+        try:
+            os.makedirs(self._cache_dir, mode=0o700, exist_ok=True)
+            # mkstemp creates the file with 0600 permissions
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(entries, cache_file)
+            os.replace(tmp_path, self._cache_file)
+        except OSError as e:
+            logger.debug(f"Unable to write token cache: {e}")
+
+
+def create_session(parsed_globals, account_id=None):
+    """
+        Create almdrlib session for the global arguments,
+        authenticated through the token cache if it's enabled.
+        Returns the session and its token cache key
+    """
+    import almdrlib
+    session = almdrlib.Session(
+            access_key_id=parsed_globals.access_key_id,
+            secret_key=parsed_globals.secret_key,
+            account_id=account_id,
+            profile=parsed_globals.profile,
+            global_endpoint=parsed_globals.global_endpoint,
+            residency=\
+                    parsed_globals.residency and \
+                    parsed_globals.residency or "default"
+    )
+    configure_transport(session, parsed_globals)
+    token_key = None
+    if ALCliTokenCache.enabled():
+        token_key = ALCliTokenCache().authenticate(session)
+    return session, token_key
+
+
+def invalidate_token(token_key, error):
+    # Drop cached token the server no longer accepts
+    response = getattr(error, 'response', None)
+    if token_key and response is not None and response.status_code == 401:
+        ALCliTokenCache().invalidate(token_key)
+
+
+class ALCliSessionCache(object):
+    """
+        Sessions and service clients kept alive between the commands of a
+        long running process, such as alcli shell, so that only the first
+        command for a given set of credentials pays for authentication and
+        for loading the service definition
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._clients = {}
+
+    def get_client(self, service, parsed_globals):
+        """
+            Returns the service client and the token cache key of its session.
+            Sessions are created for the authenticated account, operations
+            switch to the account they are given through their account_id
+            parameter, so one client serves all accounts
+        """
+        environment = tuple(sorted(
+            (name, value) for name, value in os.environ.items()
+            if name.startswith('ALERTLOGIC_')))
+        transport = tuple(sorted(get_transport_options(parsed_globals).items()))
+        key = (parsed_globals.profile, parsed_globals.access_key_id,
+               parsed_globals.secret_key, parsed_globals.global_endpoint,
+               parsed_globals.residency, environment, transport)
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = create_session(parsed_globals)
+            self._sessions[key] = entry
+        session, token_key = entry
+
+        client = self._clients.get((key, service.name))
+        if client is None:
+            client = service.create_client(session)
+            self._clients[(key, service.name)] = client
+        return client, token_key
+
+    def invalidate(self, error):
+        # Sessions hold their token, drop them all once it's rejected
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code == 401:
+            self._sessions.clear()
+            self._clients.clear()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Spans of the HTTP requests made by a command, written in the OTLP JSON
+# format of OpenTelemetry, one line per command as written by the
+# collector's file exporter
+#
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger('alcli.tracing')
+
+TRACER_NAME = 'alcli'
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+
+
+def trace_file_from_env():
+    return os.environ.get('ALCLI_TRACE_FILE')
+
+
+def make_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class ALCliSpan(object):
+    """ A timed operation, with attributes named after OpenTelemetry conventions """
+
+    def __init__(self, name, kind, parent_span_id=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = {}
+        self.error = None
+        self._started = time.monotonic()
+
+    def elapsed_ms(self):
+        return round((time.monotonic() - self._started) * 1000, 3)
+
+    def add_duration(self, name, seconds):
+        """ Add to a duration attribute, summed over retried attempts """
+        key = f"alcli.http.{name}_ms"
+        self.attributes[key] = round(self.attributes.get(key, 0) + seconds * 1000, 3)
+
+    def finish(self, error=None):
+        self.end = self.start + (time.monotonic() - self._started)
+        self.error = error
+
+    def to_otlp(self, trace_id):
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(int(self.start * 1e9)),
+            'endTimeUnixNano': str(int((self.end or time.time()) * 1e9)),
+            'attributes': [
+                make_attribute(key, value)
+                for key, value in self.attributes.items() if value is not None
+            ],
+            'status': {}
+        }
+        if self.parent_span_id:
+            span['parentSpanId'] = self.parent_span_id
+        if self.error:
+            span['status'] = {'code': STATUS_CODE_ERROR, 'message': self.error}
+        return span
+
+
+class ALCliTracer(object):
+    """
+        Collects a span for the command, and a child span for every HTTP
+        request it makes, when a trace file is given. Requests made on
+        behalf of an operation are tagged with its service and name.
+        Spans are kept per thread, so concurrent requests are traced
+        separately
+    """
+
+    def __init__(self):
+        self._file_path = None
+        self._trace_id = None
+        self._root = None
+        self._spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self._file_path is not None
+
+    def start(self, file_path, name):
+        self._file_path = file_path
+        self._trace_id = os.urandom(16).hex()
+        self._root = ALCliSpan(name, SPAN_KIND_INTERNAL)
+        self._spans = []
+
+    def finish(self, status=None):
+        """ Append the trace to the trace file, and stop tracing """
+        if not self.enabled:
+            return
+        self._root.attributes['process.exit.code'] = status
+        self._root.finish()
+        document = {
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': [
+                        make_attribute('service.name', TRACER_NAME),
+                        make_attribute('process.pid', os.getpid())
+                    ]
+                },
+                'scopeSpans': [{
+                    'scope': {'name': TRACER_NAME},
+                    'spans': [span.to_otlp(self._trace_id)
+                              for span in [self._root] + self._spans]
+                }]
+            }]
+        }
+        try:
+            with open(self._file_path, 'a') as trace_file:
+                trace_file.write(json.dumps(document, separators=(',', ':')) + '\n')
+        except OSError as e:
+            sys.stderr.write(f"Unable to write trace file '{self._file_path}': {e}\n")
+        self._file_path = None
+
+    @contextmanager
+    def operation(self, service_name, operation_name, url_template=None):
+        """ Tag requests made in this block with the operation """
+        previous = getattr(self._local, 'operation', None)
+        self._local.operation = (service_name, operation_name, url_template)
+        try:
+            yield
+        finally:
+            self._local.operation = previous
+
+    @contextmanager
+    def request(self, request):
+        """ Span of an HTTP request sent in this block, None unless tracing """
+        if not self.enabled:
+            yield None
+            return
+
+        service_name, operation_name, url_template = \
+            getattr(self._local, 'operation', None) or (None, None, None)
+        name = f"{service_name}.{operation_name}" if operation_name \
+            else f"HTTP {request.method}"
+        span = ALCliSpan(name, SPAN_KIND_CLIENT, self._root.span_id)
+        span.attributes.update({
+            'alcli.service': service_name,
+            'alcli.operation': operation_name,
+            'http.request.method': request.method,
+            'url.full': request.url,
+            'url.template': url_template,
+            'http.request.body.size': get_body_size(request.body)
+        })
+        self._local.span = span
+        try:
+            yield span
+        except Exception as e:
+            span.attributes['error.type'] = type(e).__name__
+            span.finish(error=str(e))
+            raise
+        else:
+            status = span.attributes.get('http.response.status_code')
+            span.finish(error=f"HTTP {status}" if status and status >= 400 else None)
+        finally:
+            self._local.span = None
+            with self._lock:
+                self._spans.append(span)
+
+    @property
+    def current_span(self):
+        """ Span of the request being sent by this thread """
+        return getattr(self._local, 'span', None)
+
+
+def get_body_size(body):
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        # Streamed from a file or generator
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def make_traced_adapter_class():
+    """
+        requests HTTPAdapter recording a span per request, with the time
+        spent resolving the host name, connecting, negotiating TLS and
+        waiting for the first byte of the response
+    """
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection
+    from urllib3.connection import HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool
+    from urllib3.connectionpool import HTTPSConnectionPool
+    from urllib3.exceptions import ConnectTimeoutError
+    from urllib3.exceptions import NewConnectionError
+    from urllib3.util.connection import allowed_gai_family
+
+    class TracedConnectionMixin(object):
+
+        def _new_conn(self):
+            span = tracer.current_span
+            if span is None:
+                return super()._new_conn()
+
+            start = time.monotonic()
+            dns_host = self._dns_host
+            try:
+                addresses = resolve(dns_host, self.port, allowed_gai_family())
+            except (socket.gaierror, UnicodeError):
+                # Left to urllib3 to fail with its own error
+                addresses = []
+            resolved = time.monotonic()
+            span.add_duration('dns', resolved - start)
+            if not addresses:
+                return super()._new_conn()
+
+            # Connect to the addresses just resolved in turn, as urllib3
+            # does, host name verification and SNI still use the host
+            error = None
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    conn = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+                finally:
+                    self._dns_host = dns_host
+            else:
+                raise error
+            self._connected = time.monotonic()
+            span.add_duration('connect', self._connected - resolved)
+            return conn
+
+        def getresponse(self, *args, **kwargs):
+            response = super().getresponse(*args, **kwargs)
+            span = tracer.current_span
+            if span is not None and \
+                    'alcli.http.time_to_first_byte_ms' not in span.attributes:
+                span.attributes['alcli.http.time_to_first_byte_ms'] = span.elapsed_ms()
+            return response
+
+    class TracedHTTPConnection(TracedConnectionMixin, HTTPConnection):
+        pass
+
+    class TracedHTTPSConnection(TracedConnectionMixin, HTTPSConnection):
+
+        def connect(self):
+            self._connected = None
+            super().connect()
+            span = tracer.current_span
+            if span is not None and self._connected is not None:
+                span.add_duration('tls', time.monotonic() - self._connected)
+
+    class TracedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TracedHTTPConnection
+
+    class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TracedHTTPSConnection
+
+    class TracedHTTPAdapter(HTTPAdapter):
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': TracedHTTPConnectionPool,
+                'https': TracedHTTPSConnectionPool
+            }
+
+        def send(self, request, stream=False, **kwargs):
+            with tracer.request(request) as span:
+                response = super().send(request, stream=stream, **kwargs)
+                if span is not None:
+                    record_response(span, response, stream)
+                return response
+
+    return TracedHTTPAdapter
+
+
+def resolve(host, port, family):
+    """ Addresses of host, in the order getaddrinfo returns them """
+    addresses = []
+    for _, _, _, _, sockaddr in socket.getaddrinfo(
+            host.strip('[]'), port, family, socket.SOCK_STREAM):
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+def record_response(span, response, stream):
+    span.attributes['http.response.status_code'] = response.status_code
+    retries = getattr(response.raw, 'retries', None)
+    span.attributes['http.request.resend_count'] = \
+        len(retries.history) if retries is not None else 0
+    if not stream:
+        # requests reads the body right after anyway, include it in the span
+        span.attributes['http.response.body.size'] = len(response.content)
+
+
+# Process wide tracer, enabled by --trace_file
+tracer = ALCliTracer()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# HTTP transport of almdrlib sessions: timeouts, retries and connection pool
+#
+import random
+import logging
+import functools
+
+from alcli.timing import timer
+from alcli.tracing import make_traced_adapter_class
+
+logger = logging.getLogger('alcli.transport')
+
+# Same as almdrlib's
+DEFAULT_TIMEOUT = 300
+DEFAULT_RETRIES = 5
+DEFAULT_RETRY_BACKOFF = 1.0
+
+# Connections kept alive per host, raised to --concurrency if it's higher
+DEFAULT_POOL_SIZE = 10
+
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# Transport options, set with global options or profile keys of the same name
+TRANSPORT_OPTIONS = {
+    'connect_timeout': float,
+    'read_timeout': float,
+    'retries': int,
+    'retry_backoff': float,
+    'pool_size': int,
+    'keep_alive': lambda value: str(value).lower() in ['true', 'yes', 'on', '1']
+}
+
+
+@functools.lru_cache(maxsize=None)
+def make_retry_class():
+    from urllib3.util.retry import Retry
+
+    class ALCliRetry(Retry):
+        """
+            Retries of idempotent requests with exponential backoff and full
+            jitter, so clients failing together don't retry together
+        """
+
+        def get_backoff_time(self):
+            return random.uniform(0, super().get_backoff_time())
+
+        def increment(self, *args, **kwargs):
+            retry = super().increment(*args, **kwargs)
+            timer.increment('http_retries')
+            return retry
+
+    return ALCliRetry
+
+
+def get_transport_options(parsed_globals, config=None):
+    """
+        Transport options given on the command line, else in the profile
+        of the almdrlib config, else None
+    """
+    options = {}
+    for name, convert in TRANSPORT_OPTIONS.items():
+        value = getattr(parsed_globals, name, None)
+        if value is None and config is not None:
+            value = config._get_config_option(name, None)
+        try:
+            options[name] = None if value is None else convert(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid {name} '{value}'")
+            options[name] = None
+    return options
+
+
+def configure_transport(session, parsed_globals):
+    """ Apply transport options to an almdrlib session """
+    options = get_transport_options(parsed_globals, session._config)
+
+    read_timeout = options['read_timeout'] or DEFAULT_TIMEOUT
+    session.timeout = (options['connect_timeout'] or read_timeout, read_timeout)
+
+    retries = options['retries']
+    backoff = options['retry_backoff']
+    retry_class = make_retry_class()
+    max_retries = retry_class(
+            total=DEFAULT_RETRIES if retries is None else retries,
+            backoff_factor=DEFAULT_RETRY_BACKOFF if backoff is None else backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=retry_class.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False)
+
+    pool_size = max(options['pool_size'] or DEFAULT_POOL_SIZE,
+                    getattr(parsed_globals, 'concurrency', None) or 1)
+    # Requests are traced once a trace file is given
+    adapter = make_traced_adapter_class()(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=max_retries)
+    session._session.mount('https://', adapter)
+    session._session.mount('http://', adapter)
+
+    if options['keep_alive'] is False:
+        session._session.headers['Connection'] = 'close'
+    return session
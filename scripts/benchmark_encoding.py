@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+#
+# Microbenchmark of parameter encoding: the schema of every operation is
+# analysed on each call, as alcli did before encoder plans, versus once
+# per operation with EncoderPlan. Run from anywhere, alcli is imported
+# from this checkout:
+#
+#   python scripts/benchmark_encoding.py [--services aims,assets_query] [--rounds 20]
+#
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from json import JSONDecodeError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almdrlib.client import Client
+from almdrlib.client import OpenAPIKeyWord
+
+from alcli.encoding import EncoderPlan
+from alcli.encoding import resolve_type
+
+SAMPLE_VALUES = {
+    'array': '["a", "b"]',
+    'object': '{"key": "value"}',
+    'boolean': 'true',
+    'integer': '10',
+    'number': '1.5',
+    'string': 'value'
+}
+
+
+def encode_per_call(operation, param_name, param_value):
+    """ Schema analysis on every call, as in alcli before encoder plans """
+    schema = operation.get_schema()
+    parameter = schema[OpenAPIKeyWord.PARAMETERS][param_name]
+    parameter_type = resolve_type(parameter)
+
+    if parameter_type in OpenAPIKeyWord.SIMPLE_DATA_TYPES:
+        return param_value
+    if parameter_type == OpenAPIKeyWord.ARRAY:
+        try:
+            return json.loads(param_value)
+        except JSONDecodeError:
+            pass
+    if parameter_type in OpenAPIKeyWord.OBJECT:
+        try:
+            return json.loads(param_value)
+        except JSONDecodeError:
+            regex = re.compile(
+                    '(?P<pair>(?P<key>.+?)(?:=)(?P<value>[^=]+)(?:,|$))')
+            result = dict(
+                (m.groupdict()['key'], m.groupdict()['value'])
+                for m in regex.finditer(param_value)
+            )
+            return result or param_value
+    return param_value
+
+
+def get_calls(services):
+    """ An operation and sample arguments for every operation of services """
+    calls = []
+    for service_name in services:
+        client = Client(service_name)
+        for operation_name, operation in client.operations.items():
+            parameters = operation.get_schema()[OpenAPIKeyWord.PARAMETERS]
+            kwargs = {
+                name: SAMPLE_VALUES.get(resolve_type(parameter), 'value')
+                for name, parameter in parameters.items()
+            }
+            calls.append((f"{service_name}.{operation_name}", operation, kwargs))
+    return calls
+
+
+def run_per_call(calls):
+    for _, operation, kwargs in calls:
+        {k: encode_per_call(operation, k, v) for k, v in kwargs.items()}
+
+
+def run_planned(calls, plans):
+    for name, operation, kwargs in calls:
+        plan = plans.get(name)
+        if plan is None:
+            plan = plans[name] = EncoderPlan(operation)
+        {k: plan.encode(k, v) for k, v in kwargs.items()}
+
+
+def measure(function, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter encoding microbenchmark")
+    parser.add_argument('--services', default='aims,assets_query,herald,search',
+                        help="Comma separated services whose operations are encoded")
+    parser.add_argument('--rounds', type=int, default=20,
+                        help="Times every operation is encoded")
+    args = parser.parse_args()
+
+    calls = get_calls(args.services.split(','))
+    encoded = args.rounds * sum(len(kwargs) for _, _, kwargs in calls)
+    plans = {}
+    results = [
+        ('per call schema analysis', measure(lambda: run_per_call(calls), args.rounds)),
+        ('encoder plans', measure(lambda: run_planned(calls, plans), args.rounds))
+    ]
+
+    print(f"{len(calls)} operations, {encoded} parameters encoded")
+    for label, elapsed in results:
+        print(f"{label:28}{elapsed * 1000:10.1f} ms"
+              f"{encoded / elapsed:14.0f} parameters/s")
+
+
+if __name__ == "__main__":
+    main()
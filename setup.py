@@ -80,7 +80,8 @@ setup(
     long_description_content_type='text/markdown',
     entry_points = {
         'console_scripts': [
-            'alcli = alcli.alertlogic_cli:main'
+            'alcli = alcli.alertlogic_cli:main',
+            'alcli-client = alcli.daemonclient:main'
         ]
     },
     scripts=[],
@@ -90,6 +91,9 @@ setup(
     platforms='any',
     install_requires=requirements,
     extras_require={
+        'fast': [
+            'orjson>=3.6'
+        ],
         'dev': [
             'pytest>=3',
             'mock>=2.0.0',
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs a module as a script, then writes the names of the modules it
+# imported to the file given as first argument
+DRIVER = """
+import sys, json, atexit, runpy
+modules_file = sys.argv.pop(1)
+module = sys.argv.pop(1)
+def write_modules():
+    with open(modules_file, 'w') as f:
+        json.dump(sorted(sys.modules), f)
+atexit.register(write_modules)
+runpy.run_module(module, run_name='__main__', alter_sys=True)
+"""
+
+# The SDK and HTTP stack, none of which the fast paths may import
+SDK_MODULES = [
+    'almdrlib',
+    'alsdkdefs',
+    'boto3',
+    'botocore',
+    'requests',
+    'urllib3',
+    'jmespath',
+    'yaml',
+    'jsonschema',
+    'orjson'
+]
+
+
+class TestFastPathImports(unittest.TestCase):
+    """ --version, top level help and completion don't load the SDK """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        # Build the spec and completion indexes, which does load the SDK
+        for module, args in [('alcli.alertlogic_cli', ['help']),
+                             ('alcli.completion', [''])]:
+            result, _ = cls.run_module(module, *args)
+            if result.returncode != 0:
+                raise RuntimeError(f"Unable to build indexes: {result.stderr}")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.cache_dir, ignore_errors=True)
+
+    @classmethod
+    def run_module(cls, module, *args):
+        """
+            Completed process of running module with args, and the top
+            level packages it imported
+        """
+        fd, modules_file = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        env = dict(os.environ, ALCLI_CACHE_DIR=cls.cache_dir, PAGER='cat')
+        env['PYTHONPATH'] = os.pathsep.join(
+                filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+        try:
+            result = subprocess.run(
+                    [sys.executable, '-c', DRIVER, modules_file, module] + list(args),
+                    cwd=ROOT_DIR, env=env, stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    universal_newlines=True, timeout=300)
+            with open(modules_file, 'r') as f:
+                modules = f.read()
+            return result, set(name.split('.')[0] for name in json.loads(modules or '[]'))
+        finally:
+            os.unlink(modules_file)
+
+    def assertSucceeded(self, result):
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def assertNotImported(self, modules, names):
+        self.assertEqual(sorted(modules & set(names)), [])
+
+    def test_version(self):
+        result, modules = self.run_module('alcli.alertlogic_cli', '--version')
+        self.assertSucceeded(result)
+        self.assertRegex(result.stdout, r'^alcli/\S+ Python/\S+ almdrlib/\S+ alsdkdefs/\S+')
+        self.assertNotImported(modules, SDK_MODULES + ['pydoc'])
+
+    def test_help(self):
+        result, modules = self.run_module('alcli.alertlogic_cli', 'help')
+        self.assertSucceeded(result)
+        self.assertIn('assets_query', result.stdout)
+        self.assertNotImported(modules, SDK_MODULES)
+
+    def test_completion(self):
+        result, modules = self.run_module('alcli.completion', 'assets_q')
+        self.assertSucceeded(result)
+        self.assertEqual(result.stdout.split(), ['assets_query'])
+        self.assertNotImported(modules, SDK_MODULES + ['argparse', 'pydoc'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import unittest
+
+from alcli.jsoncodec import ALCliJSONCodec
+from alcli.jsoncodec import AUTO_MIN_SIZE
+from alcli.jsoncodec import BACKEND_AUTO
+from alcli.jsoncodec import BACKEND_JSON
+from alcli.jsoncodec import BACKEND_ORJSON
+from alcli.output import OUTPUT_FORMATS
+from alcli.output import get_writer
+
+try:
+    import orjson  # noqa: F401
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+PAYLOADS = {
+    'unicode': '{"name": "h\\u00f4st ☃ \U0001d11e", "emoji": "\\ud83d\\ude00",'
+               ' "control": "tab\\there\\u001f\\u007f", "quote": "\\"/\\\\"}',
+    'big_ints': '{"safe": 9007199254740993, "big": 123456789012345678901234567890,'
+                ' "negative": -9223372036854775809, "zero": -0}',
+    'floats': '[0.1, 1e16, 1.5e-05, 0.000015, -0.0, 5e-324,'
+              ' 1.7976931348623157e308, 2.5, 100.0, 1E2]',
+    'non_finite': '{"nan": NaN, "inf": Infinity, "minus_inf": -Infinity}',
+    'nested': '{"a": {"b": [{"c": [null, true, false, {"d": {}}]}, []]},'
+              ' "a": "duplicate key, last one wins"}',
+    'records': '[{"id": 1, "name": "a\\tb", "tags": {"env": "prod"}, "score": 0.5},'
+               ' {"id": 2, "name": "é,\\"quoted\\"", "ips": ["10.0.0.1", "::1"]},'
+               ' 3, "text", null]',
+    'large': json.dumps({
+        'assets': [
+            {
+                'key': f"/aws/us-east-1/host/i-{i:08x}",
+                'name': f"hôst-{i} ☃",
+                'score': i * 0.1 + 1e-7,
+                'big': 1e16 * i,
+                'tags': {'b': [i, 2.5], 'a': None},
+                'deleted': i % 2 == 0
+            } for i in range(1000)
+        ]
+    })
+}
+
+INVALID_PAYLOADS = ['', '{"a": 1', '[1, 2,]', '{"a": 1}\n{"b": 2}', 'nul']
+
+
+def make_codec(backend):
+    codec = ALCliJSONCodec()
+    codec.use(backend)
+    return codec
+
+
+def render(result, output_format):
+    stream = io.StringIO()
+    get_writer(output_format, stream).write(result)
+    return stream.getvalue()
+
+
+class FakeResponse(object):
+
+    def __init__(self, text, encoding=None):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.encoding = encoding
+
+
+class TestJSONCodec(unittest.TestCase):
+
+    def test_large_payload_uses_fast_backend(self):
+        self.assertGreaterEqual(len(PAYLOADS['large']), AUTO_MIN_SIZE)
+
+    def test_decode_json_backend(self):
+        codec = make_codec(BACKEND_JSON)
+        for name, payload in PAYLOADS.items():
+            with self.subTest(payload=name):
+                self.assertEqual(repr(codec.loads(payload)), repr(json.loads(payload)))
+                self.assertEqual(repr(codec.loads(payload.encode())),
+                                 repr(json.loads(payload)))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            make_codec('ujson')
+
+    def test_loads_response(self):
+        codec = make_codec(BACKEND_JSON)
+        payload = PAYLOADS['unicode']
+        for encoding in [None, 'utf-8', 'UTF-8', 'ISO-8859-1']:
+            with self.subTest(encoding=encoding):
+                self.assertEqual(codec.loads_response(FakeResponse(payload, encoding)),
+                                 json.loads(payload))
+
+
+@unittest.skipUnless(HAS_ORJSON, "orjson isn't installed")
+class TestJSONCodecBackends(unittest.TestCase):
+    """ Decoded values, errors and output are the same with every backend """
+
+    BACKENDS = [BACKEND_AUTO, BACKEND_ORJSON]
+
+    def setUp(self):
+        self.reference = make_codec(BACKEND_JSON)
+
+    def test_decode(self):
+        for backend in self.BACKENDS:
+            codec = make_codec(backend)
+            for name, payload in PAYLOADS.items():
+                for data in [payload, payload.encode()]:
+                    with self.subTest(backend=backend, payload=name, type=type(data)):
+                        # repr tells apart 1 from 1.0 and True, and NaN compares equal
+                        self.assertEqual(repr(codec.loads(data)),
+                                         repr(self.reference.loads(data)))
+
+    def test_output(self):
+        for backend in self.BACKENDS:
+            codec = make_codec(backend)
+            for name, payload in PAYLOADS.items():
+                expected = self.reference.loads(payload)
+                result = codec.loads(payload)
+                for output_format in OUTPUT_FORMATS:
+                    with self.subTest(backend=backend, payload=name, output=output_format):
+                        self.assertEqual(render(result, output_format),
+                                         render(expected, output_format))
+
+    def test_default_output_format(self):
+        payload = PAYLOADS['large']
+        expected = json.dumps(json.loads(payload), sort_keys=True, indent=4)
+        result = make_codec(BACKEND_ORJSON).loads(payload)
+        self.assertEqual(render(result, None).rstrip('\n'), expected)
+
+    def test_errors(self):
+        for backend in self.BACKENDS:
+            codec = make_codec(backend)
+            for payload in INVALID_PAYLOADS:
+                with self.subTest(backend=backend, payload=payload):
+                    with self.assertRaises(json.JSONDecodeError) as expected:
+                        json.loads(payload)
+                    with self.assertRaises(json.JSONDecodeError) as error:
+                        codec.loads(payload)
+                    self.assertEqual(
+                        (error.exception.msg, error.exception.lineno, error.exception.colno),
+                        (expected.exception.msg, expected.exception.lineno,
+                         expected.exception.colno))
+
+    def test_loads_response(self):
+        codec = make_codec(BACKEND_ORJSON)
+        payload = PAYLOADS['large']
+        for encoding in [None, 'utf-8', 'ISO-8859-1']:
+            with self.subTest(encoding=encoding):
+                self.assertEqual(codec.loads_response(FakeResponse(payload, encoding)),
+                                 json.loads(payload))
+
+
+if __name__ == '__main__':
+    unittest.main()